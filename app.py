@@ -3,21 +3,32 @@ Configuration-driven Flask application for reconciliation tool.
 All processing logic is now driven by configuration files.
 """
 
+import asyncio
 import os
+import re
 import pandas as pd
 import tempfile
 import shutil
 import threading
+import itertools
+import multiprocessing
 import uuid
+import secrets
+import time
 import zipfile
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from mailjet_rest import Client
-from flask import Flask, render_template, request, send_file, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template, request, send_file, jsonify, session, redirect, url_for, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.utils import secure_filename
 from config import ReconciliationConfig
 from processors import ReconciliationProcessor
 from rate_tool_integration import run_rate_analysis, save_uploaded_file
 from datetime import datetime
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
@@ -25,11 +36,17 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 import json
+import orjson
+from jinja2.utils import htmlsafe_json_dumps
 
 app = Flask(__name__)
 app.config["UPLOAD_FOLDER"] = "uploads"
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret-key-change-in-production-12345")
 
+# When a front-end proxy (nginx/Apache) serves files, send_file only emits an
+# X-Sendfile header and the proxy streams the bytes itself
+app.use_x_sendfile = os.environ.get("USE_X_SENDFILE", "false").lower() == "true"
+
 # Configure OpenAI API Key (required for root cause analysis)
 openai_api_key = os.environ.get("OPENAI_API_KEY")
 if not openai_api_key:
@@ -44,6 +61,12 @@ os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 # Global instances
 config = ReconciliationConfig()
 processor = ReconciliationProcessor()
+
+# Reconciliation type metadata is static - serialize it once at startup
+RECONCILIATION_TYPES = config.get_all_types()
+RECONCILIATION_TYPES_JSON = json.dumps(RECONCILIATION_TYPES)
+RECONCILIATION_TYPES_SCRIPT_JSON = htmlsafe_json_dumps(RECONCILIATION_TYPES, dumps=json.dumps)
+RECONCILIATION_TYPE_KEYS = list(RECONCILIATION_TYPES.keys())
 last_output = None
 last_rate_report = None
 
@@ -52,66 +75,173 @@ batch_jobs = {}  # {job_id: {status, progress, results, error}}
 
 # Processing state for async background jobs
 processing_state = {}  # {session_id: {status, current_index, total, transactions}}
-processing_lock = threading.Lock()  # Thread-safe access to processing_state
+processing_lock = threading.Lock()  # Thread-safe access to processing_state and batch_jobs
+job_updated = threading.Condition(processing_lock)  # Notified whenever a batch job changes
 
-# Mailjet API configuration - using REST API instead of SMTP
-MAILJET_API_KEY = os.environ.get("MAILJET_API_KEY", "770477fa4a7c9c7c8aac64807c3c69ce")
-MAILJET_API_SECRET = os.environ.get("MAILJET_API_SECRET", "81a49ef6dc5e97dbe4cd67fc95a74fa7")
-EMAIL_SENDER = os.environ.get("EMAIL_SENDER", "akshit.mahajan713@gmail.com")
-EMAIL_RECIPIENT = os.environ.get("EMAIL_RECIPIENT", "dheeraj.khatri@live.com")
-EMAIL_ENABLED = os.environ.get("EMAIL_ENABLED", "true").lower() == "true"
+# Reports can carry numpy scalars and non-string keys from the pandas pipeline
+REPORT_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
 
-# Initialize Mailjet client
-mailjet_client = Client(auth=(MAILJET_API_KEY, MAILJET_API_SECRET), version='v3.1') if EMAIL_ENABLED else None
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes and decodes with orjson for jsonify and request.get_json"""
+
+    def dumps(self, obj, **kwargs):
+        option = REPORT_JSON_OPTIONS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+app.json = OrjsonProvider(app)
+
+# Job state is mirrored to disk so any gunicorn worker can answer progress
+# polls, not just the one running the job
+BATCH_JOBS_DIR = os.path.join(tempfile.gettempdir(), "reco_batch_jobs")
+os.makedirs(BATCH_JOBS_DIR, exist_ok=True)
+JOB_ID_PATTERN = re.compile(r'[A-Za-z0-9_-]+')
+
+# Job fields the progress and save routes read; the rest (the transaction
+# list, the PDF path) only matter to the worker running the job
+PERSISTED_JOB_FIELDS = ('status', 'progress', 'folder_path', 'total_transactions', 'processed',
+                        'current_transaction', 'results', 'error')
 
-def send_reconciliation_alert(report, transaction_name=""):
+# Job files whose results were never saved are swept after this many seconds
+BATCH_JOB_FILE_TTL = 6 * 60 * 60
+
+# Serializes job file writes so they land in update order without holding
+# processing_lock (and stalling progress polls) during disk I/O
+job_persist_lock = threading.Lock()
+
+def _job_path(job_id):
+    """Path of the shared state file for a batch job"""
+    return os.path.join(BATCH_JOBS_DIR, f"{job_id}.json")
+
+def _persist_job(job_id, job):
     """
-    Send email alert using Mailjet REST API when Amount Reconciled falls below 95%
+    Write a batch job's state to the shared job directory
+
+    The file is swapped in atomically so other workers never read a partial
+    state. Failures are logged and otherwise ignored; the in-memory state of
+    the owning worker stays authoritative.
 
     Args:
-        report: Report context with reconciliation metrics
-        transaction_name: Name of the transaction (optional)
+        job_id: Batch job ID
+        job: Job state dictionary (only PERSISTED_JOB_FIELDS are written)
+    """
+    path = _job_path(job_id)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps({field: job[field] for field in PERSISTED_JOB_FIELDS if field in job},
+                                 option=REPORT_JSON_OPTIONS))
+        os.replace(tmp_path, path)
+    except (OSError, TypeError) as e:
+        print(f"⚠️ Could not persist batch job {job_id}: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _remove_job_file(job_id):
+    """Delete a batch job's shared state file, if it exists"""
+    try:
+        os.remove(_job_path(job_id))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"⚠️ Could not remove batch job file {job_id}: {str(e)}")
+
+def _sweep_job_files():
+    """Delete job files older than BATCH_JOB_FILE_TTL (jobs whose results were never saved)"""
+    cutoff = time.time() - BATCH_JOB_FILE_TTL
+
+    try:
+        entries = list(os.scandir(BATCH_JOBS_DIR))
+    except OSError:
+        return
+
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+def _create_job(job_id, job):
+    """Register a new batch job"""
+    _sweep_job_files()
+
+    with job_persist_lock:
+        with processing_lock:
+            batch_jobs[job_id] = job
+            job_updated.notify_all()
+        _persist_job(job_id, job)
+
+def _update_job(job_id, **fields):
+    """Atomically update fields of a batch job"""
+    with job_persist_lock:
+        with processing_lock:
+            batch_jobs[job_id].update(fields)
+            snapshot = dict(batch_jobs[job_id])
+            job_updated.notify_all()
+        _persist_job(job_id, snapshot)
+
+def _snapshot_job(job_id):
+    """
+    Return a consistent copy of a batch job's state
+
+    Jobs started by another worker are read from the shared job directory.
 
     Returns:
-        bool: True if email sent successfully, False otherwise
+        dict: Shallow copy of the job (empty dict if the job is unknown)
     """
+    with processing_lock:
+        if job_id in batch_jobs:
+            return dict(batch_jobs[job_id])
+
+    if not JOB_ID_PATTERN.fullmatch(job_id):
+        return {}
+
     try:
-        # Check if email is enabled
-        if not EMAIL_ENABLED or not mailjet_client:
-            print("📧 Email alerts disabled - skipping")
-            return False
+        with open(_job_path(job_id), 'rb') as f:
+            return orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return {}
 
-        amount_reconciled = report["summary"]["amount_reconciled_percentage"]
+# Mailjet API configuration - using REST API instead of SMTP
+MAILJET_API_KEY = os.environ.get("MAILJET_API_KEY", "770477fa4a7c9c7c8aac64807c3c69ce")
+MAILJET_API_SECRET = os.environ.get("MAILJET_API_SECRET", "81a49ef6dc5e97dbe4cd67fc95a74fa7")
+EMAIL_SENDER = os.environ.get("EMAIL_SENDER", "akshit.mahajan713@gmail.com")
+EMAIL_RECIPIENT = os.environ.get("EMAIL_RECIPIENT", "dheeraj.khatri@live.com")
+EMAIL_ENABLED = os.environ.get("EMAIL_ENABLED", "true").lower() == "true"
 
-        # Only send email if amount reconciled is below 95%
-        if amount_reconciled >= 95:
-            print(f"✅ Amount reconciled {amount_reconciled:.2f}% >= 95% - no alert needed")
-            return False
+# Initialize Mailjet client
+mailjet_client = Client(auth=(MAILJET_API_KEY, MAILJET_API_SECRET), version='v3.1') if EMAIL_ENABLED else None
+
+# Background sender for alerts raised from request handlers
+mail_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mail")
 
-        # Prepare email content
-        transaction_info = f" - {transaction_name}" if transaction_name else ""
-        subject = f"⚠️ Reconciliation Alert{transaction_info}: {amount_reconciled:.2f}%"
+# Mailjet's v3.1 Send API accepts up to 50 messages per request
+MAILJET_MAX_MESSAGES_PER_REQUEST = 50
 
-        # Create detailed email body
-        text_content = f"""
+# Alert email body, filled from the report summary when an alert is sent
+ALERT_TEXT_TEMPLATE = """
 Reconciliation Alert - Low Match Percentage Detected{transaction_info}
 
 CRITICAL METRICS:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Amount Reconciled: {amount_reconciled:.4f}% ⚠️ (Below 95% threshold)
+Amount Reconciled: {amount_reconciled_percentage:.4f}% ⚠️ (Below 95% threshold)
 
 RECONCILIATION SUMMARY:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-• Calculated Total (INR): {report["summary"]["total_final_amount_display"]}
-• VISA Invoice Total (INR): {report["summary"]["total_visa_amount_display"]}
-• Fee Reconciled: {report["summary"]["fee_reconciled_display"]}
-• Items Reconciled: {report["summary"]["matched_items"]}/{report["summary"]["total_visa_items"]}
-• Amount Match Percentage: {report["summary"]["amount_match_display"]}
+• Calculated Total (INR): {total_final_amount_display}
+• VISA Invoice Total (INR): {total_visa_amount_display}
+• Fee Reconciled: {fee_reconciled_display}
+• Items Reconciled: {matched_items}/{total_visa_items}
+• Amount Match Percentage: {amount_match_display}
 
 ADDITIONAL DETAILS:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-• Total Fee Mappings: {report["summary"]["total_mappings"]}
-• Sheets Analyzed: {report["summary"]["sheet_count"]}
+• Total Fee Mappings: {total_mappings}
+• Sheets Analyzed: {sheet_count}
 
 ACTION REQUIRED:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -121,36 +251,135 @@ Please review the detailed reconciliation report and investigate discrepancies.
 This is an automated alert from the Card Reconciliation Tool.
 """
 
-        # Create Mailjet API request payload
-        data = {
-            'Messages': [
-                {
-                    "From": {
-                        "Email": EMAIL_SENDER,
-                        "Name": "Card Reconciliation Tool"
-                    },
-                    "To": [
-                        {
-                            "Email": EMAIL_RECIPIENT,
-                            "Name": "Reconciliation Team"
-                        }
-                    ],
-                    "Subject": subject,
-                    "TextPart": text_content,
-                }
-            ]
-        }
+def _build_alert_message(report, transaction_name=""):
+    """
+    Build the Mailjet message payload for a reconciliation alert
 
-        # Send email via Mailjet REST API
+    Args:
+        report: Report context with reconciliation metrics
+        transaction_name: Name of the transaction (optional)
+
+    Returns:
+        dict: Mailjet message entry
+    """
+    amount_reconciled = report["summary"]["amount_reconciled_percentage"]
+
+    # Prepare email content
+    transaction_info = f" - {transaction_name}" if transaction_name else ""
+    subject = f"⚠️ Reconciliation Alert{transaction_info}: {amount_reconciled:.2f}%"
+
+    # Create detailed email body
+    text_content = ALERT_TEXT_TEMPLATE.format(**report["summary"], transaction_info=transaction_info)
+
+    return {
+        "From": {
+            "Email": EMAIL_SENDER,
+            "Name": "Card Reconciliation Tool"
+        },
+        "To": [
+            {
+                "Email": EMAIL_RECIPIENT,
+                "Name": "Reconciliation Team"
+            }
+        ],
+        "Subject": subject,
+        "TextPart": text_content,
+    }
+
+def _send_alert_messages(messages):
+    """
+    Send one or more alert messages in a single Mailjet API request
+
+    Args:
+        messages: List of Mailjet message entries
+
+    Returns:
+        bool: True if Mailjet accepted the request, False otherwise
+    """
+    data = {'Messages': messages}
+
+    try:
         result = mailjet_client.send.create(data=data)
+    except requests.exceptions.ConnectionError:
+        # Connection dropped - retry once on a fresh connection
+        result = mailjet_client.send.create(data=data)
+
+    if result.status_code == 200:
+        return True
+
+    print(f"❌ Mailjet API error: Status {result.status_code}, Response: {result.json()}")
+    return False
+
+def flush_reconciliation_alerts(outbox):
+    """
+    Send all alerts queued by send_reconciliation_alert(..., outbox=...)
+
+    Messages are sent in as few Mailjet requests as possible so a batch run
+    pays the HTTPS connection and authentication cost once per request rather
+    than once per alert.
+
+    Args:
+        outbox: List of queued Mailjet message entries (emptied on return)
+
+    Returns:
+        bool: True if every queued alert was accepted, False otherwise
+    """
+    if not outbox:
+        return True
+
+    all_sent = True
+    try:
+        for start in range(0, len(outbox), MAILJET_MAX_MESSAGES_PER_REQUEST):
+            chunk = outbox[start:start + MAILJET_MAX_MESSAGES_PER_REQUEST]
+            if _send_alert_messages(chunk):
+                print(f"✅ {len(chunk)} alert email(s) sent successfully via Mailjet REST API!")
+            else:
+                all_sent = False
+    except Exception as e:
+        print(f"❌ Error sending email alerts: {str(e)}")
+        all_sent = False
+    finally:
+        outbox.clear()
+
+    return all_sent
+
+def send_reconciliation_alert(report, transaction_name="", outbox=None):
+    """
+    Send email alert using Mailjet REST API when Amount Reconciled falls below 95%
+
+    Args:
+        report: Report context with reconciliation metrics
+        transaction_name: Name of the transaction (optional)
+        outbox: Optional list to queue the alert on instead of sending it
+            immediately; send queued alerts with flush_reconciliation_alerts
+
+    Returns:
+        bool: True if email sent (or queued) successfully, False otherwise
+    """
+    try:
+        # Check if email is enabled
+        if not EMAIL_ENABLED or not mailjet_client:
+            print("📧 Email alerts disabled - skipping")
+            return False
+
+        amount_reconciled = report["summary"]["amount_reconciled_percentage"]
 
-        # Check response
-        if result.status_code == 200:
+        # Only send email if amount reconciled is below 95%
+        if amount_reconciled >= 95:
+            print(f"✅ Amount reconciled {amount_reconciled:.2f}% >= 95% - no alert needed")
+            return False
+
+        message = _build_alert_message(report, transaction_name)
+
+        if outbox is not None:
+            outbox.append(message)
+            return True
+
+        # Send email via Mailjet REST API
+        if _send_alert_messages([message]):
             print(f"✅ Alert email sent successfully via Mailjet REST API! Amount Reconciled: {amount_reconciled:.2f}%")
             return True
-        else:
-            print(f"❌ Mailjet API error: Status {result.status_code}, Response: {result.json()}")
-            return False
+        return False
 
     except Exception as e:
         print(f"❌ Error sending email alert: {str(e)}")
@@ -168,19 +397,37 @@ def scan_transaction_folders(base_path):
     """
     transaction_folders = []
 
-    if not os.path.exists(base_path):
+    try:
+        # scandir reports the entry type from the directory read itself,
+        # avoiding an extra stat() per entry
+        with os.scandir(base_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    transaction_folders.append({
+                        'name': entry.name,
+                        'path': entry.path
+                    })
+    except FileNotFoundError:
         return transaction_folders
 
-    for item in os.listdir(base_path):
-        item_path = os.path.join(base_path, item)
-        if os.path.isdir(item_path):
-            transaction_folders.append({
-                'name': item,
-                'path': item_path
-            })
-
     return sorted(transaction_folders, key=lambda x: x['name'])
 
+# Filename patterns for map_files_in_folder, tried in priority order (a file
+# named "domestic summary.xlsx" is the summary). Each alternative is a
+# lookahead, so the first one that matches anywhere in the name wins and the
+# group name is the file_mapping key.
+FILE_TYPE_PATTERN = re.compile(
+    r'^(?:'
+    r'(?=.*(?P<summary>summary))'
+    r'|(?=.*(?P<invoice>invoice))'
+    r'|(?=.*(?P<card>card.*issuance|issuance.*card))'
+    r'|(?=.*(?P<international>international))'
+    r'|(?=.*(?P<domestic>domestic))'
+    r'|(?=.*(?P<dispute>vrol|dispute))'
+    r')',
+    re.IGNORECASE | re.DOTALL
+)
+
 def map_files_in_folder(folder_path):
     """
     Automatically map files in a folder to their types
@@ -200,114 +447,360 @@ def map_files_in_folder(folder_path):
         'invoice': None
     }
 
-    if not os.path.exists(folder_path):
+    try:
+        with os.scandir(folder_path) as scanned:
+            entries = [entry for entry in scanned if entry.is_file()]
+    except FileNotFoundError:
         return file_mapping
 
-    for filename in os.listdir(folder_path):
-        filepath = os.path.join(folder_path, filename)
+    for entry in entries:
+        filename = entry.name
+        filepath = entry.path
+
+        if not filename.endswith(('.xlsx', '.xls')):
+            continue
+
+        # Map files based on filename patterns
+        match = FILE_TYPE_PATTERN.match(filename)
+        if match:
+            file_mapping[match.lastgroup] = filepath
+
+    return file_mapping
+
+def select_zip_members(names):
+    """
+    Pick the archive members worth extracting from an uploaded transactions ZIP
+
+    Only folders and Excel files are kept; macOS metadata (__MACOSX/, ._*),
+    Office lock files (~$*) and entries with absolute or parent-relative paths
+    are skipped.
+
+    Args:
+        names: Member names from ZipFile.namelist()
+
+    Returns:
+        list: Member names to extract
+    """
+    members = []
 
-        if not os.path.isfile(filepath):
+    for name in names:
+        normalized = os.path.normpath(name.replace('\\', '/'))
+        if os.path.isabs(normalized) or normalized == '..' or normalized.startswith('..' + os.sep):
             continue
 
-        if not (filename.endswith('.xlsx') or filename.endswith('.xls')):
+        parts = normalized.split(os.sep)
+        if parts[0] == '__MACOSX':
             continue
 
-        filename_lower = filename.lower()
+        if name.endswith('/'):
+            members.append(name)
+            continue
 
-        # Map files based on filename patterns
-        if 'summary' in filename_lower:
-            file_mapping['summary'] = filepath
-        elif 'invoice' in filename_lower:
-            file_mapping['invoice'] = filepath
-        elif 'card' in filename_lower and 'issuance' in filename_lower:
-            file_mapping['card'] = filepath
-        elif 'international' in filename_lower:
-            file_mapping['international'] = filepath
-        elif 'domestic' in filename_lower:
-            file_mapping['domestic'] = filepath
-        elif 'vrol' in filename_lower or 'dispute' in filename_lower:
-            file_mapping['dispute'] = filepath
+        basename = parts[-1]
+        if basename.startswith(('._', '~$')):
+            continue
 
-    return file_mapping
+        if basename.lower().endswith(('.xlsx', '.xls')):
+            members.append(name)
+
+    return members
+
+# Workspace transaction metadata lives next to the extracted files instead of
+# in the cookie-backed session, which only keeps the workspace directory
+TRANSACTIONS_FILENAME = "transactions.json"
+
+def load_transactions(temp_dir=None):
+    """
+    Load the transaction list of an uploaded workspace
+
+    Args:
+        temp_dir: Workspace directory (defaults to the one in the session)
+
+    Returns:
+        list: Transaction dictionaries (empty if the workspace has none)
+    """
+    temp_dir = temp_dir or session.get('temp_dir')
+    if not temp_dir:
+        return []
+
+    try:
+        with open(os.path.join(temp_dir, TRANSACTIONS_FILENAME), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return []
+
+def purge_workspace(temp_dir):
+    """
+    Delete a workspace directory in a background thread
+
+    Workspaces hold the extracted upload plus one report per transaction, so
+    removing them can take a while; the request returns without waiting.
+
+    Args:
+        temp_dir: Workspace directory to delete
+    """
+    thread = threading.Thread(target=shutil.rmtree, args=(temp_dir,),
+                              kwargs={'ignore_errors': True}, daemon=True)
+    thread.start()
+
+def _begin_workspace_run(temp_dir):
+    """
+    Record that a request is processing a workspace
+
+    Runs are tracked in processing_state so discard_session_workspace leaves
+    the files alone until the request has finished with them.
 
-def process_transaction_batch(base_path, job_id=None):
+    Args:
+        temp_dir: Workspace directory the request reads and writes
+
+    Returns:
+        str: Run ID to pass to _end_workspace_run
+    """
+    run_id = secrets.token_urlsafe(16)
+    with processing_lock:
+        processing_state[run_id] = {'status': 'processing', 'temp_dir': temp_dir}
+    return run_id
+
+def _end_workspace_run(run_id):
+    """Forget a workspace run recorded by _begin_workspace_run"""
+    with processing_lock:
+        processing_state.pop(run_id, None)
+
+def _workspace_in_use(temp_dir):
+    """Check whether a running batch job or processing request in this worker is using a workspace"""
+    with processing_lock:
+        return (any(job.get('status') == 'processing' and job.get('folder_path') == temp_dir
+                    for job in batch_jobs.values())
+                or any(state.get('status') == 'processing' and state.get('temp_dir') == temp_dir
+                       for state in processing_state.values()))
+
+def discard_session_workspace():
+    """
+    Forget the session's uploaded workspace and delete its files
+
+    Every new upload gets its own directory, so workspaces that are replaced
+    or abandoned must be removed here or they accumulate in the temp dir. A
+    workspace still used by a running batch job or processing request is
+    left in place.
+    """
+    temp_dir = session.pop('temp_dir', None)
+    transaction_browser_cache.pop(session.pop('batch_session_id', None), None)
+    session.pop('upload_time_ns', None)
+    session.pop('pending_count', None)
+    session.pop('auto_process_pending', None)
+    session.modified = True
+
+    if temp_dir and os.path.exists(temp_dir) and not _workspace_in_use(temp_dir):
+        purge_workspace(temp_dir)
+
+def transactions_version(temp_dir=None):
+    """
+    Identify the saved state of a workspace's transaction list
+
+    Args:
+        temp_dir: Workspace directory (defaults to the one in the session)
+
+    Returns:
+        int: Modification time (ns) of the stored list, or None if there is none
+    """
+    temp_dir = temp_dir or session.get('temp_dir')
+    if not temp_dir:
+        return None
+
+    try:
+        return os.stat(os.path.join(temp_dir, TRANSACTIONS_FILENAME)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def pending_transactions(transactions):
+    """
+    Select the workspace transactions that still need processing
+
+    Args:
+        transactions: Transaction dictionaries
+
+    Returns:
+        list: (index, transaction) pairs that are pending and have a summary file
+    """
+    return [(idx, txn) for idx, txn in enumerate(transactions)
+            if txn.get('status') == 'pending' and txn.get('has_summary')]
+
+def save_transactions(transactions, temp_dir=None):
+    """
+    Persist the transaction list of an uploaded workspace
+
+    The file is written to a temporary name and swapped in, so concurrent
+    readers never see a partially written list.
+
+    Args:
+        transactions: Transaction dictionaries
+        temp_dir: Workspace directory (defaults to the one in the session)
+    """
+    temp_dir = temp_dir or session.get('temp_dir')
+    path = os.path.join(temp_dir, TRANSACTIONS_FILENAME)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+
+    with open(tmp_path, 'w') as f:
+        json.dump(transactions, f)
+    os.replace(tmp_path, path)
+
+def _process_one(folder_info):
+    """
+    Run rate analysis for a single transaction folder
+
+    Args:
+        folder_info: Dict with 'name' and 'path' of the transaction folder,
+            and optionally 'files' if the folder has already been mapped
+
+    Returns:
+        dict: Processing result for the transaction
+    """
+    folder_name = folder_info['name']
+
+    print(f"Processing {folder_name}...")
+
+    # Map files (reuse the mapping made at upload time when available)
+    file_paths = folder_info.get('files') or map_files_in_folder(folder_info['path'])
+
+    # Check if we have at least the summary file
+    if not file_paths['summary']:
+        return {
+            'transaction_name': folder_name,
+            'status': 'failed',
+            'error': 'Summary file not found',
+            'report': None,
+            'email_sent': False
+        }
+
+    try:
+        # Run rate analysis (root cause analyses are generated for the whole batch afterwards)
+        report = run_rate_analysis(file_paths, include_root_cause=False)
+
+        return {
+            'transaction_name': folder_name,
+            'status': 'success',
+            'error': None,
+            'report': report,
+            'email_sent': False
+        }
+
+    except Exception as e:
+        return {
+            'transaction_name': folder_name,
+            'status': 'failed',
+            'error': str(e),
+            'report': None,
+            'email_sent': False
+        }
+
+def add_root_cause_analyses(reports):
+    """
+    Generate root cause analyses for a batch of reports concurrently
+
+    Sub-95% reports are sent to OpenAI in parallel from one event loop
+    instead of one blocking call per transaction.
+
+    Args:
+        reports: Report contexts; 'root_cause_analysis' is set on each
+    """
+    if not reports:
+        return
+
+    # Imported on first use so workers that never run a batch don't load the OpenAI SDK
+    from root_cause_analysis import generate_root_cause_analyses
+
+    try:
+        analyses = asyncio.run(generate_root_cause_analyses(reports, api_key=os.environ.get("OPENAI_API_KEY")))
+    except Exception as e:
+        print(f"Error generating root cause analysis: {str(e)}")
+        analyses = [None] * len(reports)
+
+    for report, analysis in zip(reports, analyses):
+        report['root_cause_analysis'] = analysis
+
+def process_transaction_batch(base_path_or_entries, job_id=None):
     """
     Process all transaction folders in batch
 
+    Folders are independent, so they are analysed concurrently in a thread
+    pool (the work is dominated by Excel I/O and OpenAI calls). Email alerts
+    are sent from the collecting thread so the mail API is not hit in parallel.
+
     Args:
-        base_path: Path to transactions folder
+        base_path_or_entries: Path to transactions folder, or a list of
+            already-scanned entries (dicts with 'name', 'path' and optionally
+            'files', as built by /upload-transactions)
         job_id: Optional job ID for progress tracking
 
     Returns:
         list: List of processing results for each transaction
     """
-    results = []
-    transaction_folders = scan_transaction_folders(base_path)
+    if isinstance(base_path_or_entries, (str, os.PathLike)):
+        transaction_folders = scan_transaction_folders(base_path_or_entries)
+    else:
+        transaction_folders = list(base_path_or_entries)
+    results = [None] * len(transaction_folders)
 
     # Update progress: Fetching transactions
     if job_id:
-        batch_jobs[job_id]['progress'] = 'fetching'
-        batch_jobs[job_id]['total_transactions'] = len(transaction_folders)
-        batch_jobs[job_id]['processed'] = 0
+        _update_job(job_id, progress='fetching', total_transactions=len(transaction_folders), processed=0)
 
-    for idx, folder_info in enumerate(transaction_folders):
-        folder_name = folder_info['name']
-        folder_path = folder_info['path']
+    if not transaction_folders:
+        if job_id:
+            _update_job(job_id, progress='finalizing')
+        return []
 
-        print(f"Processing {folder_name}...")
+    # Update progress: Running reconciliation
+    if job_id:
+        _update_job(job_id, progress='reconciling')
 
-        # Update progress: Running reconciliation
-        if job_id:
-            batch_jobs[job_id]['progress'] = 'reconciling'
-            batch_jobs[job_id]['current_transaction'] = folder_name
-            batch_jobs[job_id]['processed'] = idx
-
-        # Map files
-        file_paths = map_files_in_folder(folder_path)
-
-        # Check if we have at least the summary file
-        if not file_paths['summary']:
-            results.append({
-                'transaction_name': folder_name,
-                'status': 'failed',
-                'error': 'Summary file not found',
-                'report': None,
-                'email_sent': False
-            })
-            continue
+    max_workers = min(8, len(transaction_folders))
 
-        try:
-            # Run rate analysis
-            report = run_rate_analysis(file_paths)
+    # Alerts are queued during the run and sent together at the end
+    alert_outbox = []
+    alerted_indices = []
+    processed = 0
 
-            # Check if email should be sent
-            email_sent = False
-            if report and report.get("summary"):
-                amount_reconciled = report["summary"]["amount_reconciled_percentage"]
-                if amount_reconciled < 95:
-                    send_reconciliation_alert(report)
-                    email_sent = True
-
-            results.append({
-                'transaction_name': folder_name,
-                'status': 'success',
-                'error': None,
-                'report': report,
-                'email_sent': email_sent
-            })
+    # Publish progress about 100 times over the batch rather than per transaction
+    progress_step = max(1, len(transaction_folders) // 100)
 
-        except Exception as e:
-            results.append({
-                'transaction_name': folder_name,
-                'status': 'failed',
-                'error': str(e),
-                'report': None,
-                'email_sent': False
-            })
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_idx = {
+                executor.submit(_process_one, folder_info): idx
+                for idx, folder_info in enumerate(transaction_folders)
+            }
+
+            for future in as_completed(future_to_idx):
+                idx = future_to_idx[future]
+                result = future.result()
+
+                # Keep results in folder order for the report
+                results[idx] = result
+
+                # Check if email should be sent
+                report = result['report']
+                if report and report.get("summary"):
+                    amount_reconciled = report["summary"]["amount_reconciled_percentage"]
+                    if amount_reconciled < 95:
+                        if send_reconciliation_alert(report, transaction_name=result['transaction_name'],
+                                                     outbox=alert_outbox):
+                            result['email_sent'] = True
+                            alerted_indices.append(idx)
+
+                processed += 1
+                if job_id and (processed % progress_step == 0 or processed == len(transaction_folders)):
+                    _update_job(job_id, processed=processed, current_transaction=result['transaction_name'])
+    finally:
+        if not flush_reconciliation_alerts(alert_outbox):
+            for idx in alerted_indices:
+                results[idx]['email_sent'] = False
+
+    add_root_cause_analyses([result['report'] for result in results if result['report']])
 
     # Update progress: Finalizing
     if job_id:
-        batch_jobs[job_id]['progress'] = 'finalizing'
+        _update_job(job_id, progress='finalizing')
 
     return results
 
@@ -320,72 +813,159 @@ def run_batch_processing_thread(job_id, folder_path):
         folder_path: Path to transactions folder
     """
     try:
-        # Process the batch
-        results = process_transaction_batch(folder_path, job_id)
+        # Process the batch, reusing pre-mapped transactions when we have them
+        results = process_transaction_batch(_snapshot_job(job_id).get('transactions') or folder_path, job_id)
 
         # Generate PDF report
         pdf_path = generate_batch_pdf_report(results)
 
         # Update job status to completed
-        batch_jobs[job_id]['status'] = 'completed'
-        batch_jobs[job_id]['results'] = results
-        batch_jobs[job_id]['pdf_path'] = pdf_path
+        _update_job(job_id, status='completed', results=results, pdf_path=pdf_path)
 
     except Exception as e:
         # Update job status to failed
-        batch_jobs[job_id]['status'] = 'failed'
-        batch_jobs[job_id]['error'] = str(e)
+        _update_job(job_id, status='failed', error=str(e))
+
+# Batch PDF report styles (built once, shared by every report)
+PDF_STYLES = getSampleStyleSheet()
+
+PDF_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=PDF_STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#1F4E78'),
+    spaceAfter=30,
+    alignment=TA_CENTER
+)
+
+PDF_HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=PDF_STYLES['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#1F4E78'),
+    spaceAfter=12,
+    spaceBefore=12
+)
+
+PDF_SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1F4E78')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+])
+
+def _metrics_table_style(bg_color):
+    """Build the per-transaction metrics table style with the given body color"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#007BFF')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), bg_color),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+    ])
 
-def generate_batch_pdf_report(results):
+# Highlight rows if amount reconciled < 95% (an alert was sent)
+PDF_METRICS_TABLE_STYLE_OK = _metrics_table_style(colors.lightgrey)
+PDF_METRICS_TABLE_STYLE_ALERT = _metrics_table_style(colors.HexColor('#FFE6E6'))
+
+def _transaction_flowables(result):
     """
-    Generate comprehensive PDF report for batch processing
+    Build the PDF flowables describing one batch transaction
 
     Args:
-        results: List of processing results
+        result: Processing result for the transaction
 
     Returns:
-        str: Path to generated PDF file
+        list: ReportLab flowables for the transaction section
     """
-    output_path = "batch_reconciliation_report.pdf"
-    doc = SimpleDocTemplate(output_path, pagesize=A4)
-
-    # Container for PDF elements
     elements = []
 
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1F4E78'),
-        spaceAfter=30,
-        alignment=TA_CENTER
+    transaction_heading = Paragraph(
+        f"Transaction: {result['transaction_name']}",
+        PDF_HEADING_STYLE
     )
+    elements.append(transaction_heading)
 
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#1F4E78'),
-        spaceAfter=12,
-        spaceBefore=12
-    )
+    if result['status'] == 'failed':
+        error_text = Paragraph(
+            f"<b>Status:</b> <font color='red'>FAILED</font><br/>"
+            f"<b>Error:</b> {result['error']}",
+            PDF_STYLES['Normal']
+        )
+        elements.append(error_text)
+        elements.append(Spacer(1, 20))
+        return elements
+
+    report = result['report']
+
+    # Status with email indicator
+    status_color = 'red' if result['email_sent'] else 'green'
+    status_text = f"<b>Status:</b> <font color='{status_color}'>SUCCESS"
+    if result['email_sent']:
+        status_text += " (Email Alert Sent)"
+    status_text += "</font>"
+
+    status_para = Paragraph(status_text, PDF_STYLES['Normal'])
+    elements.append(status_para)
+    elements.append(Spacer(1, 10))
+
+    # Key metrics
+    if report and report.get('summary'):
+        metrics_data = [
+            ['Metric', 'Value'],
+            ['Amount Reconciled', report['summary']['amount_reconciled_display']],
+            ['Fee Reconciled', report['summary']['fee_reconciled_display']],
+            ['Items Reconciled', f"{report['summary']['matched_items']}/{report['summary']['total_visa_items']}"],
+            ['Amount Match %', report['summary']['amount_match_display']],
+            ['Calculated Total', report['summary']['total_final_amount_display']],
+            ['VISA Total', report['summary']['total_visa_amount_display']],
+            ['Fee Mappings', str(report['summary']['total_mappings'])]
+        ]
+
+        metrics_table = Table(metrics_data, colWidths=[2.5*inch, 2.5*inch])
+        metrics_table.setStyle(
+            PDF_METRICS_TABLE_STYLE_ALERT if result['email_sent'] else PDF_METRICS_TABLE_STYLE_OK
+        )
+
+        elements.append(metrics_table)
+
+    elements.append(Spacer(1, 20))
+
+    return elements
+
+def _summary_flowables(results):
+    """
+    Build the PDF title and executive summary flowables for a batch
+
+    Args:
+        results: List of processing results
+
+    Returns:
+        list: ReportLab flowables for the report header
+    """
+    elements = []
 
     # Title
-    title = Paragraph("Batch Reconciliation Report", title_style)
+    title = Paragraph("Batch Reconciliation Report", PDF_TITLE_STYLE)
     elements.append(title)
 
     # Generation date
     date_text = Paragraph(
         f"<b>Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-        styles['Normal']
+        PDF_STYLES['Normal']
     )
     elements.append(date_text)
     elements.append(Spacer(1, 20))
 
     # Summary section
-    summary_heading = Paragraph("Executive Summary", heading_style)
+    summary_heading = Paragraph("Executive Summary", PDF_HEADING_STYLE)
     elements.append(summary_heading)
 
     total_transactions = len(results)
@@ -402,86 +982,37 @@ def generate_batch_pdf_report(results):
     ]
 
     summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1F4E78')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-    ]))
+    summary_table.setStyle(PDF_SUMMARY_TABLE_STYLE)
 
     elements.append(summary_table)
     elements.append(Spacer(1, 30))
 
-    # Detail for each transaction
-    for result in results:
-        transaction_heading = Paragraph(
-            f"Transaction: {result['transaction_name']}",
-            heading_style
-        )
-        elements.append(transaction_heading)
-
-        if result['status'] == 'failed':
-            error_text = Paragraph(
-                f"<b>Status:</b> <font color='red'>FAILED</font><br/>"
-                f"<b>Error:</b> {result['error']}",
-                styles['Normal']
-            )
-            elements.append(error_text)
-            elements.append(Spacer(1, 20))
-            continue
+    return elements
 
-        report = result['report']
-
-        # Status with email indicator
-        status_color = 'red' if result['email_sent'] else 'green'
-        status_text = f"<b>Status:</b> <font color='{status_color}'>SUCCESS"
-        if result['email_sent']:
-            status_text += " (Email Alert Sent)"
-        status_text += "</font>"
-
-        status_para = Paragraph(status_text, styles['Normal'])
-        elements.append(status_para)
-        elements.append(Spacer(1, 10))
-
-        # Key metrics
-        if report and report.get('summary'):
-            metrics_data = [
-                ['Metric', 'Value'],
-                ['Amount Reconciled', report['summary']['amount_reconciled_display']],
-                ['Fee Reconciled', report['summary']['fee_reconciled_display']],
-                ['Items Reconciled', f"{report['summary']['matched_items']}/{report['summary']['total_visa_items']}"],
-                ['Amount Match %', report['summary']['amount_match_display']],
-                ['Calculated Total', report['summary']['total_final_amount_display']],
-                ['VISA Total', report['summary']['total_visa_amount_display']],
-                ['Fee Mappings', str(report['summary']['total_mappings'])]
-            ]
-
-            metrics_table = Table(metrics_data, colWidths=[2.5*inch, 2.5*inch])
-
-            # Highlight row if amount reconciled < 95%
-            bg_color = colors.HexColor('#FFE6E6') if result['email_sent'] else colors.lightgrey
-
-            metrics_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#007BFF')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('BACKGROUND', (0, 1), (-1, -1), bg_color),
-                ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-            ]))
-
-            elements.append(metrics_table)
+def generate_batch_pdf_report(results):
+    """
+    Generate comprehensive PDF report for batch processing
 
-        elements.append(Spacer(1, 20))
+    Args:
+        results: List of processing results
+
+    Returns:
+        str: Path to generated PDF file
+    """
+    output_path = "batch_reconciliation_report.pdf"
+    doc = SimpleDocTemplate(output_path, pagesize=A4)
 
-        # Add page break between transactions (except last one)
-        if result != results[-1]:
+    # Container for PDF elements
+    elements = _summary_flowables(results)
+
+    # Detail for each transaction
+    last_idx = len(results) - 1
+    for idx, result in enumerate(results):
+        elements.extend(_transaction_flowables(result))
+
+        # Add page break between transactions (except last one; failed
+        # transactions are short and share the page with the next one)
+        if idx < last_idx and result['status'] != 'failed':
             elements.append(PageBreak())
 
     # Build PDF
@@ -489,7 +1020,39 @@ def generate_batch_pdf_report(results):
 
     return output_path
 
-def format_worksheet(worksheet, header_color='1F4E78', header_font_color='FFFFFF'):
+# Rate report cell styles (built once; registered per workbook as named styles)
+REPORT_CELL_SIDE = Side(style='thin', color='D3D3D3')
+REPORT_CELL_BORDER = Border(
+    left=REPORT_CELL_SIDE,
+    right=REPORT_CELL_SIDE,
+    top=REPORT_CELL_SIDE,
+    bottom=REPORT_CELL_SIDE
+)
+REPORT_HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='center', wrap_text=True)
+REPORT_CELL_ALIGNMENT = Alignment(horizontal='left', vertical='center', wrap_text=True)
+
+# Named style shared by all data cells of a rate report workbook
+DATA_CELL_STYLE = 'recon_data'
+
+def _column_widths(df):
+    """
+    Compute Excel column widths for a DataFrame written with to_excel
+
+    Args:
+        df: DataFrame that was written to the worksheet (header on row 1)
+
+    Returns:
+        list: Width per column, padded and capped at 50
+    """
+    widths = []
+    for column in df.columns:
+        values = df[column]
+        max_length = values[values.notna()].astype(str).str.len().max()
+        max_length = 0 if pd.isna(max_length) else int(max_length)
+        widths.append(min(max(max_length, len(str(column))) + 2, 50))  # Cap at 50 for very long text
+    return widths
+
+def format_worksheet(worksheet, header_color='1F4E78', header_font_color='FFFFFF', df=None):
     """
     Apply professional formatting to an Excel worksheet
 
@@ -497,57 +1060,85 @@ def format_worksheet(worksheet, header_color='1F4E78', header_font_color='FFFFFF
         worksheet: openpyxl worksheet object
         header_color: Hex color for header background (default: dark blue)
         header_font_color: Hex color for header font (default: white)
+        df: Optional DataFrame written to the sheet; when given, column
+            widths are computed from it instead of from the cells
     """
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    from openpyxl.utils import get_column_letter
-
-    # Define styles
-    header_fill = PatternFill(start_color=header_color, end_color=header_color, fill_type='solid')
-    header_font = Font(bold=True, color=header_font_color, size=12)
-    header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-
-    cell_alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
-    border = Border(
-        left=Side(style='thin', color='D3D3D3'),
-        right=Side(style='thin', color='D3D3D3'),
-        top=Side(style='thin', color='D3D3D3'),
-        bottom=Side(style='thin', color='D3D3D3')
-    )
+    # Header and data cells reference named styles stored once in the workbook
+    workbook = worksheet.parent
+    header_style = f'recon_header_{header_color}_{header_font_color}'
+
+    if header_style not in workbook.named_styles:
+        workbook.add_named_style(NamedStyle(
+            name=header_style,
+            font=Font(bold=True, color=header_font_color, size=12),
+            fill=PatternFill(start_color=header_color, end_color=header_color, fill_type='solid'),
+            alignment=REPORT_HEADER_ALIGNMENT,
+            border=REPORT_CELL_BORDER
+        ))
+
+    if DATA_CELL_STYLE not in workbook.named_styles:
+        workbook.add_named_style(NamedStyle(
+            name=DATA_CELL_STYLE,
+            alignment=REPORT_CELL_ALIGNMENT,
+            border=REPORT_CELL_BORDER
+        ))
 
     # Format header row
     for cell in worksheet[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_alignment
-        cell.border = border
+        cell.style = header_style
+
+    track_widths = df is None
+    max_lengths = [0] * worksheet.max_column
 
     # Format data rows
     for row in worksheet.iter_rows(min_row=2, max_row=worksheet.max_row, min_col=1, max_col=worksheet.max_column):
-        for cell in row:
-            cell.alignment = cell_alignment
-            cell.border = border
+        for col_idx, cell in enumerate(row):
+            cell.style = DATA_CELL_STYLE
+
+            if track_widths and cell.value:
+                cell_length = len(str(cell.value))
+                if cell_length > max_lengths[col_idx]:
+                    max_lengths[col_idx] = cell_length
 
     # Auto-adjust column widths
-    for column in worksheet.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-
-        for cell in column:
-            try:
-                if cell.value:
-                    cell_length = len(str(cell.value))
-                    if cell_length > max_length:
-                        max_length = cell_length
-            except:
-                pass
-
-        # Set width with some padding
-        adjusted_width = min(max_length + 2, 50)  # Cap at 50 for very long text
-        worksheet.column_dimensions[column_letter].width = adjusted_width
+    if track_widths:
+        for cell in worksheet[1]:
+            if cell.value:
+                max_lengths[cell.column - 1] = max(max_lengths[cell.column - 1], len(str(cell.value)))
+        widths = [min(max_length + 2, 50) for max_length in max_lengths]  # Cap at 50 for very long text
+    else:
+        widths = _column_widths(df)
+
+    for col_idx, width in enumerate(widths, 1):
+        worksheet.column_dimensions[get_column_letter(col_idx)].width = width
 
     # Set row height for header
     worksheet.row_dimensions[1].height = 25
 
+# Report field -> Excel column header for the rate report sheets
+CARD_MONTHLY_COLUMNS = {
+    'period': 'Period',
+    'cards': 'Cards Issued'
+}
+
+TRANSACTION_OVERVIEW_COLUMNS = {
+    'label': 'Type',
+    'amount': 'Amount (USD)',
+    'volume': 'Volume'
+}
+
+FEE_DETAIL_COLUMNS = {
+    'fee_type': 'Fee Type',
+    'rate_chart': 'Rate Chart',
+    'calculation_method': 'Calculation Method',
+    'calculated_amount_display': 'Calculated Amount',
+    'exchange_rate': 'Exchange Rate',
+    'final_amount_display': 'Final Amount (INR)',
+    'visa_amount_display': 'VISA Amount (INR)',
+    'percentage_diff_display': 'Percentage Difference',
+    'diff_status': 'Status'
+}
+
 def generate_rate_report_excel(report):
     """
     Generate comprehensive Excel report with all reconciliation data
@@ -559,9 +1150,6 @@ def generate_rate_report_excel(report):
         str: Path to generated Excel file
     """
     try:
-        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-        from openpyxl.utils import get_column_letter
-
         output_path = "rate_reconciliation_report.xlsx"
 
         with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
@@ -599,7 +1187,7 @@ def generate_rate_report_excel(report):
             }
             summary_df = pd.DataFrame(summary_data)
             summary_df.to_excel(writer, sheet_name='Summary', index=False)
-            format_worksheet(writer.sheets['Summary'], header_color='1F4E78')
+            format_worksheet(writer.sheets['Summary'], header_color='1F4E78', df=summary_df)
 
             # Sheet 2: Card Issuance Data
             if report.get('card'):
@@ -608,54 +1196,36 @@ def generate_rate_report_excel(report):
                 }
                 card_df = pd.DataFrame(card_data)
                 card_df.to_excel(writer, sheet_name='Card Issuance Summary', index=False)
-                format_worksheet(writer.sheets['Card Issuance Summary'], header_color='28A745')
+                format_worksheet(writer.sheets['Card Issuance Summary'], header_color='28A745', df=card_df)
 
                 if report['card'].get('monthly_data'):
-                    monthly_data = []
-                    for entry in report['card']['monthly_data']:
-                        monthly_data.append({
-                            'Period': entry['period'],
-                            'Cards Issued': entry['cards']
-                        })
-                    monthly_df = pd.DataFrame(monthly_data)
+                    monthly_df = pd.DataFrame(
+                        report['card']['monthly_data'], columns=list(CARD_MONTHLY_COLUMNS)
+                    ).rename(columns=CARD_MONTHLY_COLUMNS)
                     monthly_df.to_excel(writer, sheet_name='Card Issuance Detail', index=False)
-                    format_worksheet(writer.sheets['Card Issuance Detail'], header_color='28A745')
+                    format_worksheet(writer.sheets['Card Issuance Detail'], header_color='28A745', df=monthly_df)
 
             # Sheet 3: Transaction Overview
             if report.get('transactions'):
-                trans_data = []
-                for entry in report['transactions']['entries']:
-                    trans_data.append({
-                        'Type': entry['label'],
-                        'Amount (USD)': entry['amount'],
-                        'Volume': entry['volume']
-                    })
-                trans_df = pd.DataFrame(trans_data)
+                trans_df = pd.DataFrame(
+                    report['transactions']['entries'], columns=list(TRANSACTION_OVERVIEW_COLUMNS)
+                ).rename(columns=TRANSACTION_OVERVIEW_COLUMNS)
                 trans_df.to_excel(writer, sheet_name='Transaction Overview', index=False)
-                format_worksheet(writer.sheets['Transaction Overview'], header_color='007BFF')
+                format_worksheet(writer.sheets['Transaction Overview'], header_color='007BFF', df=trans_df)
 
             # Sheet 4-N: Detailed Fee Analysis by Sheet
             if report.get('sheets'):
                 for idx, sheet in enumerate(report['sheets']):
-                    fee_data = []
-                    for row in sheet['rows']:
-                        fee_data.append({
-                            'Fee Type': row['fee_type'],
-                            'Rate Chart': row['rate_chart'],
-                            'Calculation Method': row['calculation_method'],
-                            'Calculated Amount': row['calculated_amount_display'],
-                            'Exchange Rate': row['exchange_rate'] if row['exchange_rate'] else 'N/A',
-                            'Final Amount (INR)': row['final_amount_display'],
-                            'VISA Amount (INR)': row['visa_amount_display'],
-                            'Percentage Difference': row['percentage_diff_display'],
-                            'Status': row['diff_status']
-                        })
-
-                    if fee_data:
-                        fee_df = pd.DataFrame(fee_data)
+                    if sheet['rows']:
+                        fee_df = pd.DataFrame(sheet['rows'], columns=list(FEE_DETAIL_COLUMNS))
+                        exchange_rate = fee_df['exchange_rate']
+                        fee_df['exchange_rate'] = exchange_rate.mask(
+                            exchange_rate.isna() | (exchange_rate == 0), 'N/A'
+                        )
+                        fee_df = fee_df.rename(columns=FEE_DETAIL_COLUMNS)
                         sheet_name = sheet['name'][:31]  # Excel sheet name limit is 31 characters
                         fee_df.to_excel(writer, sheet_name=sheet_name, index=False)
-                        format_worksheet(writer.sheets[sheet_name], header_color='6F42C1')
+                        format_worksheet(writer.sheets[sheet_name], header_color='6F42C1', df=fee_df)
 
             # Sheet: Warnings (if any)
             if report.get('warnings'):
@@ -664,7 +1234,8 @@ def generate_rate_report_excel(report):
                 }
                 warnings_df = pd.DataFrame(warnings_data)
                 warnings_df.to_excel(writer, sheet_name='Warnings', index=False)
-                format_worksheet(writer.sheets['Warnings'], header_color='FFC107', header_font_color='000000')
+                format_worksheet(writer.sheets['Warnings'], header_color='FFC107', header_font_color='000000',
+                                 df=warnings_df)
 
         return output_path
 
@@ -688,25 +1259,24 @@ def index():
             else:
                 # Process the reconciliation
                 result = processor.process(recon_type, request.files)
-                last_output = pd.DataFrame(result) if result else None
+                # Kept as-is; converted to a DataFrame only when downloaded
+                last_output = result if result else None
                 
         except Exception as e:
             error_message = f"Error processing files: {str(e)}"
     
-    # Get all available reconciliation types for the form
-    reconciliation_types = config.get_all_types()
-    
     return render_template("index_dynamic.html", 
                          result=result, 
                          recon_type=recon_type, 
                          error_message=error_message,
-                         reconciliation_types=reconciliation_types,
+                         reconciliation_types=RECONCILIATION_TYPES,
+                         reconciliation_types_json=RECONCILIATION_TYPES_SCRIPT_JSON,
                          result_config=config.RESULT_TABLES.get(recon_type, {}))
 
 @app.route("/api/reconciliation-types")
 def get_reconciliation_types():
     """API endpoint to get all reconciliation types configuration"""
-    return jsonify(config.get_all_types())
+    return app.response_class(RECONCILIATION_TYPES_JSON, mimetype="application/json")
 
 @app.route("/rates-file", methods=["GET", "POST"])
 def rates_file():
@@ -743,9 +1313,10 @@ def rates_file():
             # Store report globally for download
             last_rate_report = report
 
-            # Send email alert if Amount Reconciled is below 95%
+            # Send email alert if Amount Reconciled is below 95% (in the background,
+            # so the response is not held up by the mail API round trip)
             if report and report.get("summary"):
-                send_reconciliation_alert(report)
+                mail_executor.submit(send_reconciliation_alert, report)
 
         except Exception as exc:
             error_message = str(exc)
@@ -757,6 +1328,8 @@ def rates_file():
 @app.route("/upload-transactions", methods=["POST"])
 def upload_transactions():
     """Upload ZIP file and extract transactions to workspace"""
+    temp_dir = None
+
     try:
         # Get ZIP file
         zip_file = request.files.get("transactions_zip")
@@ -765,21 +1338,20 @@ def upload_transactions():
             return jsonify({"error": "Please upload a ZIP file"}), 400
 
         # Create unique session ID
-        session_id = str(uuid.uuid4())
+        session_id = secrets.token_urlsafe(16)
 
         # Extract to temp folder with session ID
         temp_dir = os.path.join(tempfile.gettempdir(), f"batch_{session_id}")
         os.makedirs(temp_dir, exist_ok=True)
 
-        # Save and extract ZIP
-        zip_path = os.path.join(temp_dir, "upload.zip")
-        zip_file.save(zip_path)
-
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-
-        # Remove the zip file after extraction
-        os.remove(zip_path)
+        # Extract straight from the upload stream (no intermediate copy on disk)
+        try:
+            zip_file.stream.seek(0)
+            with zipfile.ZipFile(zip_file.stream, 'r') as zip_ref:
+                zip_ref.extractall(temp_dir, members=select_zip_members(zip_ref.namelist()))
+        except zipfile.BadZipFile:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return jsonify({"error": "Uploaded file is not a valid ZIP archive"}), 400
 
         # Find the extracted folder (might be nested)
         extracted_folders = [f for f in os.listdir(temp_dir) if os.path.isdir(os.path.join(temp_dir, f))]
@@ -812,11 +1384,16 @@ def upload_transactions():
                 'file_count': sum(1 for v in file_mapping.values() if v)
             })
 
-        # Store in session
+        # Keep the transaction list server-side; the session only points at it
+        save_transactions(transactions_data, temp_dir)
+
+        # The new workspace is valid, so it replaces the previous one
+        discard_session_workspace()
+
         session['batch_session_id'] = session_id
         session['temp_dir'] = temp_dir
-        session['transactions'] = transactions_data
-        session['upload_time'] = datetime.now().isoformat()
+        session['pending_count'] = len(pending_transactions(transactions_data))
+        session['upload_time_ns'] = time.time_ns()
         session['auto_process_pending'] = True  # Flag to trigger auto-processing
         session.modified = True
 
@@ -827,18 +1404,33 @@ def upload_transactions():
         })
 
     except Exception as e:
+        # Drop the half-built workspace; the previous one stays usable
+        if temp_dir and temp_dir != session.get('temp_dir'):
+            shutil.rmtree(temp_dir, ignore_errors=True)
         return jsonify({"error": str(e)}), 500
 
+# Rendered transaction browser pages, reused until the workspace's transaction
+# list is saved again; the oldest entries are evicted past the limit
+TRANSACTION_BROWSER_CACHE_SIZE = 32
+transaction_browser_cache = {}  # {batch_session_id: (transactions_version, html)}
+
 @app.route("/transaction-browser")
 def transaction_browser():
     """Display transaction browser workspace"""
     # Check if user has uploaded files
-    if 'batch_session_id' not in session or 'transactions' not in session:
+    if 'batch_session_id' not in session or 'temp_dir' not in session:
         # No active session - redirect to upload page
         return redirect(url_for('rates_file_automated'))
 
-    transactions = session.get('transactions', [])
     session_id = session.get('batch_session_id', '')
+    version = transactions_version()
+
+    # Serve the cached page while the transaction list is unchanged
+    cached = transaction_browser_cache.get(session_id)
+    if cached and cached[0] == version and not session.get('auto_process_pending'):
+        return cached[1]
+
+    transactions = load_transactions()
 
     # If no transactions, redirect to upload page
     if not transactions:
@@ -848,42 +1440,53 @@ def transaction_browser():
     if session.get('auto_process_pending'):
         return redirect(url_for('processing_page'))
 
-    return render_template('transaction_browser.html',
-                         transactions=transactions,
-                         session_id=session_id)
+    html = render_template('transaction_browser.html',
+                           transactions=transactions,
+                           session_id=session_id)
+
+    transaction_browser_cache.pop(session_id, None)
+    transaction_browser_cache[session_id] = (version, html)
+    while len(transaction_browser_cache) > TRANSACTION_BROWSER_CACHE_SIZE:
+        transaction_browser_cache.pop(next(iter(transaction_browser_cache)), None)
+
+    return html
 
 @app.route("/processing-page")
 def processing_page():
     """Show processing page with progress"""
-    transactions = session.get('transactions', [])
+    # Count transactions that need processing (kept in the session whenever
+    # the transaction list is saved)
+    total_count = session.get('pending_count')
 
-    if not transactions:
-        return redirect(url_for('rates_file_automated'))
+    if total_count is None:
+        transactions = load_transactions()
 
-    # Count transactions that need processing
-    total_count = sum(1 for t in transactions if t.get('status') == 'pending' and t.get('has_summary'))
+        if not transactions:
+            return redirect(url_for('rates_file_automated'))
+
+        total_count = len(pending_transactions(transactions))
 
     return render_template('processing_page.html', total_count=total_count)
 
-def process_single_transaction(idx, transaction, temp_dir):
+def process_single_transaction(task):
     """
     Worker function to process a single transaction
 
+    Runs in a worker process, so it only receives what it needs and reports
+    back through its return value; the caller applies the result to the
+    transaction list.
+
     Args:
-        idx: Transaction index
-        transaction: Transaction dictionary
-        temp_dir: Temporary directory for storing reports
+        task: Tuple of (transaction index, mapping of file type to file path,
+            transaction name, temporary directory for storing reports)
 
     Returns:
         dict: Processing result with index, status, and metadata
     """
-    try:
-        # Update processing state
-        with processing_lock:
-            transaction['status'] = 'processing'
+    idx, file_paths, transaction_name, temp_dir = task
 
+    try:
         # Run rate analysis
-        file_paths = transaction['files']
         report = run_rate_analysis(file_paths)
 
         # Check email alert
@@ -891,95 +1494,209 @@ def process_single_transaction(idx, transaction, temp_dir):
         if report and report.get("summary"):
             amount_reconciled = report["summary"]["amount_reconciled_percentage"]
             if amount_reconciled < 95:
-                email_sent = send_reconciliation_alert(report, transaction_name=transaction.get('name', ''))
+                email_sent = send_reconciliation_alert(report, transaction_name=transaction_name)
 
-        # Save report to file
+        # Save report to file (orjson serializes straight to bytes in one write)
         report_filename = f"report_{idx}.json"
         report_path = os.path.join(temp_dir, report_filename)
-        with open(report_path, 'w') as f:
-            json.dump(report, f)
-
-        # Update transaction status
-        with processing_lock:
-            transaction['status'] = 'completed'
-            transaction['report_file'] = report_filename
-            transaction['email_sent'] = email_sent
-            transaction['amount_reconciled'] = report['summary']['amount_reconciled_display']
+        with open(report_path, 'wb') as f:
+            f.write(orjson.dumps(report, option=REPORT_JSON_OPTIONS))
 
         return {
             'index': idx,
             'status': 'success',
             'email_sent': email_sent,
-            'transaction_name': transaction.get('name', '')
+            'transaction_name': transaction_name,
+            'report_file': report_filename,
+            'amount_reconciled': report['summary']['amount_reconciled_display']
         }
 
     except Exception as e:
-        with processing_lock:
-            transaction['status'] = 'failed'
-            transaction['error'] = str(e)
-
         return {
             'index': idx,
             'status': 'failed',
             'error': str(e),
-            'transaction_name': transaction.get('name', '')
+            'transaction_name': transaction_name
         }
 
+def _apply_transaction_result(transaction, result):
+    """
+    Record a process_single_transaction result on its transaction entry
+
+    The transaction list is loaded per request and only the request thread
+    applies results, so no lock is taken.
+
+    Args:
+        transaction: Transaction dictionary to update
+        result: Result returned by process_single_transaction
+    """
+    if result['status'] == 'success':
+        transaction.update(status='completed',
+                           report_file=result['report_file'],
+                           email_sent=result['email_sent'],
+                           amount_reconciled=result['amount_reconciled'])
+    else:
+        transaction.update(status='failed', error=result['error'])
+
+def _transaction_tasks(indexed_transactions, temp_dir):
+    """Build process_single_transaction task tuples for (index, transaction) pairs"""
+    return [(idx, txn['files'], txn.get('name', ''), temp_dir) for idx, txn in indexed_transactions]
+
+def _map_chunksize(task_count, max_workers):
+    """Tasks per executor.map chunk: about four chunks per worker"""
+    return max(1, task_count // (max_workers * 4))
+
+# Processes for workspace transactions: at most 2, and only while in use, for
+# free tier memory constraints (each process holds its own copy of the app)
+TRANSACTION_POOL_WORKERS = 2
+
+# Seconds the pool may sit idle before its processes are shut down
+TRANSACTION_POOL_IDLE_TIMEOUT = 60
+
+# Shared by the requests of this worker while any are running or the idle
+# timer is pending; transaction_pool_lock guards all four
+transaction_executor = None
+transaction_pool_users = 0
+transaction_pool_timer = None
+transaction_pool_lock = threading.Lock()
+
+def _new_transaction_executor():
+    """
+    Create the process pool used to process workspace transactions
+
+    Rate analysis is CPU-bound, so transactions run in separate processes to
+    avoid contending for the GIL. Back-to-back requests reuse the pool; it is
+    shut down once idle for TRANSACTION_POOL_IDLE_TIMEOUT.
+
+    Returns:
+        ProcessPoolExecutor: Pool with TRANSACTION_POOL_WORKERS processes
+    """
+    # spawn rather than forkserver: no helper server process stays resident
+    # after the pool has been shut down
+    return ProcessPoolExecutor(max_workers=TRANSACTION_POOL_WORKERS,
+                               mp_context=multiprocessing.get_context('spawn'))
+
+def _acquire_transaction_executor():
+    """Register a user of the transaction pool and return the pool, creating it if needed"""
+    global transaction_executor, transaction_pool_users, transaction_pool_timer
+
+    with transaction_pool_lock:
+        if transaction_pool_timer is not None:
+            transaction_pool_timer.cancel()
+            transaction_pool_timer = None
+
+        if transaction_executor is None:
+            transaction_executor = _new_transaction_executor()
+
+        transaction_pool_users += 1
+        return transaction_executor
+
+def _release_transaction_executor():
+    """Unregister a pool user; the last one out starts the idle shutdown timer"""
+    global transaction_pool_users, transaction_pool_timer
+
+    with transaction_pool_lock:
+        transaction_pool_users -= 1
+        if transaction_pool_users == 0 and transaction_executor is not None:
+            transaction_pool_timer = threading.Timer(TRANSACTION_POOL_IDLE_TIMEOUT,
+                                                     _shutdown_idle_transaction_executor)
+            transaction_pool_timer.daemon = True
+            transaction_pool_timer.start()
+
+def _shutdown_idle_transaction_executor():
+    """Shut the transaction pool down if nobody has used it since the idle timer started"""
+    global transaction_executor, transaction_pool_timer
+
+    with transaction_pool_lock:
+        if transaction_pool_users or transaction_executor is None:
+            return
+        executor = transaction_executor
+        transaction_executor = None
+        transaction_pool_timer = None
+
+    executor.shutdown(wait=False)
+
+def _discard_transaction_executor(executor):
+    """Drop a broken pool so the next request starts a fresh one"""
+    global transaction_executor
+
+    with transaction_pool_lock:
+        if transaction_executor is executor:
+            transaction_executor = None
+
+    executor.shutdown(wait=False)
+
+def _map_transactions(tasks):
+    """
+    Run process_single_transaction over tasks on the shared process pool
+
+    A process that dies (e.g. killed for memory) breaks the whole pool, so a
+    broken pool is discarded before the error is raised.
+
+    Args:
+        tasks: Task tuples built by _transaction_tasks
+
+    Yields:
+        dict: process_single_transaction results in task order
+    """
+    executor = _acquire_transaction_executor()
+    try:
+        yield from executor.map(process_single_transaction, tasks,
+                                chunksize=_map_chunksize(len(tasks), TRANSACTION_POOL_WORKERS))
+    except BrokenProcessPool:
+        _discard_transaction_executor(executor)
+        raise
+    finally:
+        _release_transaction_executor()
+
 @app.route("/execute-batch-processing", methods=["POST"])
 def execute_batch_processing():
     """Execute batch processing with parallel processing for faster execution"""
+    temp_dir = session.get('temp_dir')
+    run_id = _begin_workspace_run(temp_dir)
+
     try:
-        transactions = session.get('transactions', [])
-        temp_dir = session.get('temp_dir')
+        transactions = load_transactions(temp_dir)
 
         # Find all pending transactions
-        pending_tasks = []
-        for idx, txn in enumerate(transactions):
-            if txn.get('status') == 'pending' and txn.get('has_summary'):
-                pending_tasks.append((idx, txn))
+        pending_tasks = pending_transactions(transactions)
 
         if not pending_tasks:
             return jsonify({'status': 'completed', 'message': 'No pending transactions to process'})
 
         # Initialize processing state
-        session_id = session.get('session_id', str(uuid.uuid4()))
+        session_id = session.get('session_id') or secrets.token_urlsafe(16)
+        state = {
+            'status': 'processing',
+            'current_index': 0,
+            'total': len(pending_tasks),
+            'completed': 0
+        }
+        completed_counter = itertools.count(1)
         with processing_lock:
-            processing_state[session_id] = {
-                'status': 'processing',
-                'current_index': 0,
-                'total': len(pending_tasks),
-                'completed': 0
-            }
+            processing_state[session_id] = state
 
-        # Process transactions in parallel (max 2 workers for free tier memory constraints)
-        max_workers = min(2, len(pending_tasks))
+        # Process transactions in parallel on the shared process pool
         results = []
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_idx = {
-                executor.submit(process_single_transaction, idx, txn, temp_dir): idx
-                for idx, txn in pending_tasks
-            }
-
-            # Process results as they complete
-            for future in as_completed(future_to_idx):
-                result = future.result()
-                results.append(result)
+        # Results stream back in task order as each chunk completes
+        for result in _map_transactions(_transaction_tasks(pending_tasks, temp_dir)):
+            _apply_transaction_result(transactions[result['index']], result)
+            results.append(result)
 
-                # Update processing state
-                with processing_lock:
-                    if session_id in processing_state:
-                        processing_state[session_id]['completed'] += 1
-                        processing_state[session_id]['current_index'] = result['index']
+            # Progress fields are only written by this thread and each
+            # store is a single atomic dict assignment, so no lock is needed
+            state['completed'] = next(completed_counter)
+            state['current_index'] = result['index']
 
         # Clear processing state
         with processing_lock:
             if session_id in processing_state:
                 processing_state[session_id]['status'] = 'completed'
 
-        # Update session
-        session['transactions'] = transactions
+        # Persist the updated statuses once all results are in
+        save_transactions(transactions, temp_dir)
+        session['pending_count'] = len(pending_transactions(transactions))
         session.pop('auto_process_pending', None)
         session.modified = True
 
@@ -992,6 +1709,8 @@ def execute_batch_processing():
     except Exception as e:
         print(f"❌ Batch processing error: {str(e)}")
         return jsonify({'status': 'failed', 'error': str(e)}), 500
+    finally:
+        _end_workspace_run(run_id)
 
 @app.route("/batch-processing-status")
 def batch_processing_status():
@@ -1005,12 +1724,14 @@ def batch_processing_status():
 @app.route("/process-workspace-transactions", methods=["POST"])
 def process_workspace_transactions():
     """Process selected transactions from workspace with parallel processing"""
+    temp_dir = session.get('temp_dir')
+    run_id = _begin_workspace_run(temp_dir)
+
     try:
         data = request.get_json()
         indices = data.get('transaction_indices', [])
 
-        transactions = session.get('transactions', [])
-        temp_dir = session.get('temp_dir')
+        transactions = load_transactions(temp_dir)
 
         # Prepare tasks for parallel processing
         tasks = []
@@ -1021,24 +1742,17 @@ def process_workspace_transactions():
         if not tasks:
             return jsonify({'results': []})
 
-        # Process transactions in parallel (max 2 workers for free tier)
-        max_workers = min(2, len(tasks))
+        # Process transactions in parallel on the shared process pool
         results = []
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_idx = {
-                executor.submit(process_single_transaction, idx, txn, temp_dir): idx
-                for idx, txn in tasks
-            }
-
-            # Collect results as they complete
-            for future in as_completed(future_to_idx):
-                result = future.result()
-                results.append(result)
+        # Collect results in task order
+        for result in _map_transactions(_transaction_tasks(tasks, temp_dir)):
+            _apply_transaction_result(transactions[result['index']], result)
+            results.append(result)
 
-        # Update session
-        session['transactions'] = transactions
+        # Persist the updated statuses once all results are in
+        save_transactions(transactions, temp_dir)
+        session['pending_count'] = len(pending_transactions(transactions))
         session.pop('auto_process_pending', None)
         session.modified = True
 
@@ -1046,12 +1760,14 @@ def process_workspace_transactions():
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    finally:
+        _end_workspace_run(run_id)
 
 @app.route("/workspace-result/<int:index>")
 def workspace_result(index):
     """View detailed results for a specific workspace transaction"""
-    transactions = session.get('transactions', [])
     temp_dir = session.get('temp_dir')
+    transactions = load_transactions(temp_dir)
 
     if index >= len(transactions):
         return render_template("error.html", error="Transaction not found"), 404
@@ -1067,15 +1783,14 @@ def workspace_result(index):
     if not report_filename:
         return render_template("error.html", error="Report data not available"), 404
 
-    import json
     report_path = os.path.join(temp_dir, report_filename)
 
     if not os.path.exists(report_path):
         return render_template("error.html", error="Report file not found"), 404
 
     try:
-        with open(report_path, 'r') as f:
-            report = json.load(f)
+        with open(report_path, 'rb') as f:
+            report = orjson.loads(f.read())
     except Exception as e:
         return render_template("error.html", error=f"Error loading report: {str(e)}"), 500
 
@@ -1095,18 +1810,7 @@ def clear_auto_process_flag():
 def clear_workspace():
     """Clear workspace and delete temporary files"""
     try:
-        temp_dir = session.get('temp_dir')
-
-        if temp_dir and os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir, ignore_errors=True)
-
-        # Clear session data
-        session.pop('batch_session_id', None)
-        session.pop('temp_dir', None)
-        session.pop('transactions', None)
-        session.pop('upload_time', None)
-        session.pop('auto_process_pending', None)
-        session.modified = True
+        discard_session_workspace()
 
         return jsonify({"status": "cleared"})
 
@@ -1116,20 +1820,47 @@ def clear_workspace():
 @app.route("/rates-file-automated", methods=["GET"])
 def rates_file_automated():
     """Automated batch processing with ZIP upload - Always show upload page"""
-    # Clear any old session data when visiting the upload page
-    session.pop('batch_session_id', None)
-    session.pop('temp_dir', None)
-    session.pop('transactions', None)
-    session.pop('upload_time', None)
-    session.pop('auto_process_pending', None)
-    session.modified = True
+    # Clear any old session data (and its files) when visiting the upload page
+    discard_session_workspace()
 
     return render_template("rates_tab_automated.html")
 
+# Name-to-position indexes of saved batch results by job ID, kept server-side so
+# the session cookie only carries the job ID; the oldest are evicted past the limit
+BATCH_RESULTS_INDEX_CACHE_SIZE = 32
+batch_results_indexes = {}  # {job_id: {transaction_name: position}}
+
+def _index_batch_results(job_id, results):
+    """Remember where each transaction sits in a job's saved results"""
+    batch_results_indexes.pop(job_id, None)
+    batch_results_indexes[job_id] = {r['transaction_name']: i for i, r in enumerate(results)}
+    while len(batch_results_indexes) > BATCH_RESULTS_INDEX_CACHE_SIZE:
+        batch_results_indexes.pop(next(iter(batch_results_indexes)), None)
+
+def _find_batch_result(batch_results, transaction_name):
+    """
+    Find a transaction in the session's saved batch results
+
+    Uses the index built when the results were saved, and falls back to a
+    scan for results saved without one (other worker, restart, evicted).
+
+    Returns:
+        dict: The transaction's result, or None if it is not in the results
+    """
+    index = batch_results_indexes.get(session.get('batch_job_id'))
+    if index is not None:
+        position = index.get(transaction_name)
+        if position is not None and position < len(batch_results):
+            return batch_results[position]
+        return None
+
+    return next((r for r in batch_results if r['transaction_name'] == transaction_name), None)
+
 @app.route("/clear-batch-results")
 def clear_batch_results():
     """Clear stored batch results and redirect to automated batch page"""
     session.pop('batch_results', None)
+    batch_results_indexes.pop(session.pop('batch_job_id', None), None)
     session.pop('batch_folder_path', None)
     session.modified = True
     return jsonify({"status": "cleared"})
@@ -1140,12 +1871,7 @@ def batch_transaction_detail(transaction_name):
     # Retrieve batch results from session
     batch_results = session.get('batch_results', [])
 
-    # Find the transaction in batch results
-    transaction_result = None
-    for result in batch_results:
-        if result['transaction_name'] == transaction_name:
-            transaction_result = result
-            break
+    transaction_result = _find_batch_result(batch_results, transaction_name)
 
     if not transaction_result:
         return render_template("error.html", error="Transaction not found. Please run batch analysis again."), 404
@@ -1172,7 +1898,11 @@ def download_batch_pdf():
     try:
         pdf_path = "batch_reconciliation_report.pdf"
         if os.path.exists(pdf_path):
-            return send_file(pdf_path, as_attachment=True, download_name="batch_reconciliation_report.pdf")
+            # The report is rewritten in place by each batch run, so clients must
+            # revalidate; an unchanged file is answered with 304 Not Modified
+            return send_file(pdf_path, as_attachment=True, download_name="batch_reconciliation_report.pdf",
+                             conditional=True, etag=True, last_modified=os.path.getmtime(pdf_path),
+                             max_age=0)
         else:
             return "No batch report available to download.", 404
     except Exception as e:
@@ -1184,8 +1914,8 @@ def download():
     global last_output
     if last_output is not None:
         path = "reconciliation_output.xlsx"
-        last_output.to_excel(path, index=False)
-        return send_file(path, as_attachment=True)
+        pd.DataFrame(last_output).to_excel(path, index=False)
+        return send_file(path, as_attachment=True, conditional=True)
     return "No reconciliation results available to download.", 404
 
 @app.route("/download-rate-report")
@@ -1195,7 +1925,8 @@ def download_rate_report():
     if last_rate_report is not None:
         try:
             path = generate_rate_report_excel(last_rate_report)
-            return send_file(path, as_attachment=True, download_name="rate_reconciliation_report.xlsx")
+            return send_file(path, as_attachment=True, download_name="rate_reconciliation_report.xlsx",
+                             conditional=True)
         except Exception as e:
             return f"Error generating report: {str(e)}", 500
     return "No rate analysis results available to download.", 404
@@ -1206,30 +1937,39 @@ def start_batch_analysis():
     try:
         data = request.get_json()
         folder_path = data.get("folder_path", "").strip()
+        transactions = None
 
-        if not folder_path:
+        if data.get("use_workspace"):
+            # Process the uploaded workspace; its files were mapped at upload time
+            folder_path = session.get('temp_dir', '')
+            transactions = load_transactions(folder_path)
+            if not transactions:
+                return jsonify({"error": "No uploaded transactions found. Please upload a ZIP file."}), 400
+
+        elif not folder_path:
             return jsonify({"error": "Please enter a folder path."}), 400
 
-        if not os.path.exists(folder_path):
+        elif not os.path.exists(folder_path):
             return jsonify({"error": f"Folder path does not exist: {folder_path}"}), 400
 
-        if not os.path.isdir(folder_path):
+        elif not os.path.isdir(folder_path):
             return jsonify({"error": "Path must be a directory."}), 400
 
         # Generate unique job ID
-        job_id = str(uuid.uuid4())
+        job_id = secrets.token_urlsafe(16)
 
         # Initialize job tracking
-        batch_jobs[job_id] = {
+        _create_job(job_id, {
             'status': 'processing',
             'progress': 'initializing',
             'folder_path': folder_path,
+            'transactions': transactions,
             'total_transactions': 0,
             'processed': 0,
             'current_transaction': '',
             'results': None,
             'error': None
-        }
+        })
 
         # Start processing in background thread
         thread = threading.Thread(target=run_batch_processing_thread, args=(job_id, folder_path))
@@ -1244,14 +1984,16 @@ def start_batch_analysis():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route("/batch-progress/<job_id>")
-def batch_progress(job_id):
-    """Get progress status for a batch job"""
-    job = batch_jobs.get(job_id)
+def _progress_response(job):
+    """
+    Build the progress payload reported to the UI for a batch job
 
-    if not job:
-        return jsonify({"error": "Job not found"}), 404
+    Args:
+        job: Snapshot of the job state
 
+    Returns:
+        dict: Status, progress step and the fields relevant to that status
+    """
     response = {
         "status": job['status'],
         "progress": job['progress']
@@ -1268,12 +2010,74 @@ def batch_progress(job_id):
     elif job['status'] == 'failed':
         response['error'] = job.get('error', 'Unknown error')
 
-    return jsonify(response)
+    return response
+
+# Seconds between keep-alive comments on an idle progress stream
+PROGRESS_STREAM_KEEPALIVE = 15
+
+def _wait_for_job_change(job_id, job):
+    """
+    Block until a batch job differs from the given snapshot
+
+    Jobs run by this worker are awaited on the job_updated condition; jobs
+    owned by another worker are re-read from the shared job store.
+
+    Args:
+        job_id: Batch job ID
+        job: Last snapshot sent to the client
+    """
+    with job_updated:
+        if job_id in batch_jobs:
+            job_updated.wait_for(lambda: batch_jobs.get(job_id) != job,
+                                 timeout=PROGRESS_STREAM_KEEPALIVE)
+            return
+
+    time.sleep(1)
+
+@app.route("/batch-progress/<job_id>")
+def batch_progress(job_id):
+    """Get progress status for a batch job"""
+    job = _snapshot_job(job_id)
+
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify(_progress_response(job))
+
+@app.route("/batch-progress-stream/<job_id>")
+def batch_progress_stream(job_id):
+    """Stream progress updates for a batch job as Server-Sent Events"""
+    if not _snapshot_job(job_id):
+        return jsonify({"error": "Job not found"}), 404
+
+    def stream():
+        last_event = None
+
+        while True:
+            job = _snapshot_job(job_id)
+            if not job:
+                return
+
+            # Only push when the payload changed; otherwise keep the connection alive
+            event = app.json.dumps(_progress_response(job))
+            if event != last_event:
+                yield f"data: {event}\n\n"
+                last_event = event
+            else:
+                yield ": keep-alive\n\n"
+
+            if job['status'] != 'processing':
+                return
+
+            _wait_for_job_change(job_id, job)
+
+    return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route("/save-batch-results/<job_id>", methods=["POST"])
 def save_batch_results(job_id):
     """Save batch results to session for viewing"""
-    job = batch_jobs.get(job_id)
+    job = _snapshot_job(job_id)
 
     if not job:
         return jsonify({"error": "Job not found"}), 404
@@ -1283,9 +2087,14 @@ def save_batch_results(job_id):
 
     # Store results in session
     session['batch_results'] = job['results']
+    session['batch_job_id'] = job_id
+    _index_batch_results(job_id, job['results'])
     session['batch_folder_path'] = job['folder_path']
     session.modified = True
 
+    # The results now live in the session; the shared job file is no longer needed
+    _remove_job_file(job_id)
+
     return jsonify({"status": "saved"})
 
 @app.route("/health")
@@ -1293,7 +2102,7 @@ def health_check():
     """Health check endpoint"""
     return jsonify({
         "status": "healthy",
-        "available_types": list(config.get_all_types().keys()),
+        "available_types": RECONCILIATION_TYPE_KEYS,
         "version": "2.0-config-driven"
     })
 
@@ -1311,6 +2120,30 @@ def test_config():
         "openai_key_length": len(os.environ.get("OPENAI_API_KEY", "")) if openai_key_set else 0
     })
 
+def reset_worker_state():
+    """
+    Give a forked server worker its own in-process state
+
+    Called from gunicorn's post_fork hook when the app is preloaded in the
+    master, so workers never share locks, job tables, caches or executors
+    inherited from the parent.
+    """
+    global processing_lock, job_updated, job_persist_lock, mail_executor
+    global transaction_executor, transaction_pool_users, transaction_pool_timer, transaction_pool_lock
+
+    batch_jobs.clear()
+    processing_state.clear()
+    transaction_browser_cache.clear()
+    batch_results_indexes.clear()
+    processing_lock = threading.Lock()
+    job_updated = threading.Condition(processing_lock)
+    job_persist_lock = threading.Lock()
+    mail_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mail")
+    transaction_executor = None
+    transaction_pool_users = 0
+    transaction_pool_timer = None
+    transaction_pool_lock = threading.Lock()
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template("error.html", error="Page not found"), 404
@@ -6,7 +6,10 @@ bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
 
 # Worker configuration
 workers = 1  # Free tier: 1 worker to save memory
-worker_class = "sync"
+# Threaded worker: progress polls and downloads are I/O-bound and must not queue
+# behind a slow request; CPU-heavy analysis runs in background threads/processes
+worker_class = "gthread"
+threads = 8
 worker_connections = 10
 
 # Timeout configuration (increased for long processing)
@@ -22,5 +25,11 @@ loglevel = "info"
 # Process naming
 proc_name = "card-reco-tool"
 
-# Preload app for memory efficiency
-preload_app = False  # Set to False to avoid memory issues on free tier
+# Preload app for memory efficiency: pandas, openpyxl, reportlab and openai are
+# imported once in the master and shared copy-on-write with the workers
+preload_app = True
+
+def post_fork(server, worker):
+    """Reset per-worker state inherited from the preloaded master"""
+    from app import reset_worker_state
+    reset_worker_state()
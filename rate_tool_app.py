@@ -10,6 +10,10 @@ import os
 from tabulate import tabulate
 import re
 
+# Optional pandas Excel engine override (e.g. "calamine" with pandas >= 2.2 and
+# python-calamine installed). Defaults to pandas' choice per file type.
+EXCEL_ENGINE = os.environ.get("EXCEL_ENGINE") or None
+
 # Make tkinter optional for server deployment
 try:
     import tkinter as tk
@@ -140,7 +144,7 @@ def analyze_excel_structure(file_path):
     """
     try:
         # Read Excel file
-        xl_file = pd.ExcelFile(file_path)
+        xl_file = pd.ExcelFile(file_path, engine=EXCEL_ENGINE)
         sheets = xl_file.sheet_names
 
         analysis_results = {
@@ -155,7 +159,7 @@ def analyze_excel_structure(file_path):
         # Analyze each sheet
         for sheet_name in sheets:
             print(f"\nAnalyzing sheet: '{sheet_name}'")
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
+            df = xl_file.parse(sheet_name)
 
             sheet_analysis = analyze_sheet_for_fee_mapping(df, sheet_name)
             if sheet_analysis['mappings']:
@@ -323,7 +327,7 @@ def extract_card_issuance_data(file_path):
     try:
         print(f"Analyzing card issuance file: {os.path.basename(file_path)}")
 
-        xl_file = pd.ExcelFile(file_path)
+        xl_file = pd.ExcelFile(file_path, engine=EXCEL_ENGINE)
         sheets = xl_file.sheet_names
 
         card_data = {
@@ -333,7 +337,7 @@ def extract_card_issuance_data(file_path):
         }
 
         for sheet_name in sheets:
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
+            df = xl_file.parse(sheet_name)
 
             # Look for card issuance patterns
             cards_found = find_card_issuance_values(df, sheet_name)
@@ -723,13 +727,13 @@ def process_specific_transaction_file(file_path, expected_type):
     try:
         print(f"Processing {expected_type} transaction file: {os.path.basename(file_path)}")
 
-        xl_file = pd.ExcelFile(file_path)
+        xl_file = pd.ExcelFile(file_path, engine=EXCEL_ENGINE)
         sheets = xl_file.sheet_names
 
         best_data = {'total_amount': 0, 'total_volume': 0, 'transactions': []}
 
         for sheet_name in sheets:
-            df = pd.read_excel(file_path, sheet_name=sheet_name)
+            df = xl_file.parse(sheet_name)
 
             if expected_type == 'disputes':
                 # Special handling for dispute files using the working logic
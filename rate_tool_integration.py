@@ -1,10 +1,8 @@
 import os
 import sys
-import io
 import tempfile
 import shutil
 import importlib.util
-from contextlib import redirect_stdout
 from typing import Optional, Dict
 
 from werkzeug.utils import secure_filename
@@ -22,6 +20,16 @@ spec = importlib.util.spec_from_file_location(module_name, RATE_APP_FILE)
 rate_tool_app = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(rate_tool_app)
 
+
+def _discard_output(*args, **kwargs):
+    """Stand-in for print() inside the loaded rate calculator"""
+
+
+# The rate calculator reports its progress with print(). Analyses run on
+# several threads at once, so that output is silenced by shadowing print in
+# the loaded module instead of swapping the process-wide sys.stdout
+rate_tool_app.print = _discard_output
+
 analyze_excel_structure = rate_tool_app.analyze_excel_structure
 extract_card_issuance_data = rate_tool_app.extract_card_issuance_data
 process_specific_transaction_file = rate_tool_app.process_specific_transaction_file
@@ -77,18 +85,19 @@ def extract_invoice_data_dynamically(file_paths):
 
         try:
             import pandas as pd
-            excel_file = pd.ExcelFile(file_path)
+            # Parse sheets from the one opened workbook instead of re-reading the file per sheet
+            excel_file = pd.ExcelFile(file_path, engine=rate_tool_app.EXCEL_ENGINE)
 
             # Look for invoice-related sheets
             for sheet_name in excel_file.sheet_names:
                 sheet_name_lower = sheet_name.lower()
                 if 'invoice' in sheet_name_lower or 'bill' in sheet_name_lower:
-                    df = pd.read_excel(file_path, sheet_name=sheet_name)
+                    df = excel_file.parse(sheet_name)
                     invoice_data.update(extract_invoice_from_sheet(df, sheet_name))
 
             # Also check if main sheet has invoice-like data
             if not invoice_data:
-                df = pd.read_excel(file_path, sheet_name=excel_file.sheet_names[0])
+                df = excel_file.parse(excel_file.sheet_names[0])
                 potential_invoice = extract_invoice_from_sheet(df, excel_file.sheet_names[0])
                 if potential_invoice:
                     invoice_data.update(potential_invoice)
@@ -589,66 +598,78 @@ def build_result_context(analysis_results, card_data, transaction_data, warnings
     return context
 
 
-def run_rate_analysis(file_paths: Dict[str, Optional[str]]):
-    warnings = []
+def run_rate_analysis(file_paths: Dict[str, Optional[str]], include_root_cause: bool = True):
+    """
+    Run the full rate analysis for one set of uploaded files
 
-    with redirect_stdout(io.StringIO()):
-        analysis_results = analyze_excel_structure(file_paths.get('summary'))
-
-        card_data = None
-        if file_paths.get('card'):
-            card_data = extract_card_issuance_data(file_paths['card'])
-            if not card_data or card_data.get("total_cards", 0) == 0:
-                warnings.append("No card issuance data found or total cards is 0. Proceeding with fee rate mapping only.")
-                card_data = None
-
-        transaction_data = {
-            "international": {"total_amount": 0, "total_volume": 0, "transactions": []},
-            "domestic": {"total_amount": 0, "total_volume": 0, "transactions": []},
-            "disputes": {"total_amount": 0, "total_volume": 0, "transactions": []},
-            "all_transactions": {"total_amount": 0, "total_volume": 0}
-        }
+    Args:
+        file_paths: Mapped file paths (summary, card, international, ...)
+        include_root_cause: Generate the OpenAI root cause analysis inline.
+            Batch callers pass False and generate analyses for all reports
+            together with generate_root_cause_analyses.
+    """
+    warnings = []
 
-        if file_paths.get('international'):
-            transaction_data["international"] = process_specific_transaction_file(
-                file_paths['international'], "international"
-            )
+    analysis_results = analyze_excel_structure(file_paths.get('summary'))
 
-        if file_paths.get('domestic'):
-            transaction_data["domestic"] = process_specific_transaction_file(
-                file_paths['domestic'], "domestic"
-            )
+    card_data = None
+    if file_paths.get('card'):
+        card_data = extract_card_issuance_data(file_paths['card'])
+        if not card_data or card_data.get("total_cards", 0) == 0:
+            warnings.append("No card issuance data found or total cards is 0. Proceeding with fee rate mapping only.")
+            card_data = None
 
-        if file_paths.get('dispute'):
-            transaction_data["disputes"] = process_specific_transaction_file(
-                file_paths['dispute'], "disputes"
-            )
+    transaction_data = {
+        "international": {"total_amount": 0, "total_volume": 0, "transactions": []},
+        "domestic": {"total_amount": 0, "total_volume": 0, "transactions": []},
+        "disputes": {"total_amount": 0, "total_volume": 0, "transactions": []},
+        "all_transactions": {"total_amount": 0, "total_volume": 0}
+    }
 
-        transaction_data["all_transactions"]["total_amount"] = (
-            transaction_data["international"]["total_amount"] +
-            transaction_data["domestic"]["total_amount"] +
-            transaction_data["disputes"]["total_amount"]
+    if file_paths.get('international'):
+        transaction_data["international"] = process_specific_transaction_file(
+            file_paths['international'], "international"
         )
-        transaction_data["all_transactions"]["total_volume"] = (
-            transaction_data["international"]["total_volume"] +
-            transaction_data["domestic"]["total_volume"] +
-            transaction_data["disputes"]["total_volume"]
+
+    if file_paths.get('domestic'):
+        transaction_data["domestic"] = process_specific_transaction_file(
+            file_paths['domestic'], "domestic"
         )
 
-        if transaction_data["all_transactions"]["total_volume"] == 0:
-            warnings.append("No transaction data found.")
-            transaction_data = None
+    if file_paths.get('dispute'):
+        transaction_data["disputes"] = process_specific_transaction_file(
+            file_paths['dispute'], "disputes"
+        )
 
-        # Extract invoice data dynamically
-        invoice_data = extract_invoice_data_dynamically(file_paths)
-        if not invoice_data:
-            if not file_paths.get('invoice'):
-                warnings.append("No invoice file uploaded. VISA Amount column will show 'N/A' for all items.")
-            else:
-                warnings.append("No invoice data found in uploaded files. Please check the invoice file format.")
+    transaction_data["all_transactions"]["total_amount"] = (
+        transaction_data["international"]["total_amount"] +
+        transaction_data["domestic"]["total_amount"] +
+        transaction_data["disputes"]["total_amount"]
+    )
+    transaction_data["all_transactions"]["total_volume"] = (
+        transaction_data["international"]["total_volume"] +
+        transaction_data["domestic"]["total_volume"] +
+        transaction_data["disputes"]["total_volume"]
+    )
+
+    if transaction_data["all_transactions"]["total_volume"] == 0:
+        warnings.append("No transaction data found.")
+        transaction_data = None
+
+    # Extract invoice data dynamically
+    invoice_data = extract_invoice_data_dynamically(file_paths)
+    if not invoice_data:
+        if not file_paths.get('invoice'):
+            warnings.append("No invoice file uploaded. VISA Amount column will show 'N/A' for all items.")
+        else:
+            warnings.append("No invoice data found in uploaded files. Please check the invoice file format.")
 
     report_context = build_result_context(analysis_results, card_data, transaction_data, warnings, invoice_data)
 
+    if not include_root_cause:
+        report_context['root_cause_analysis'] = None
+        return report_context
+
     # Generate root cause analysis if amount reconciled < 95%
     try:
         from root_cause_analysis import generate_root_cause_analysis
@@ -3,10 +3,204 @@ Root Cause Analysis Service using OpenAI API
 Analyzes reconciliation discrepancies and provides insights
 """
 
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, APIError, RateLimitError
+import asyncio
+import hashlib
+import io
 import json
 import os
-from typing import Dict, List, Optional
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Patterns used to turn the model's plain-text analysis into HTML
+
+# PART headers (e.g., "**PART 1: FEE-BY-FEE ANALYSIS**"), with optional ** around the text
+_PART_HEADER_RE = re.compile(r'(?:^|\n)\*{0,2}(PART\s+\d+:?\s*[A-Z\s\-]+?)\*{0,2}(?:\n|$)', re.MULTILINE)
+
+# Fee sections, numbered or not (e.g., "**1. Integrity Fee variance (+56.9%)**",
+# "Integrity Fee variance (+56.9%)"); the number stays part of the heading
+_FEE_VARIANCE_RE = re.compile(
+    r'(?:^|\n)\*{0,2}((?:\d+\.\s+)?[A-Za-z\s\-]+?(?:Fee|Fees))\s+(?:variance\s+)?\(([\+\-][\d\.]+%)\)\*{0,2}',
+    re.MULTILINE
+)
+
+# "Missing Fee Lines", "Overall Patterns" and similar section headers
+_MISSING_SECTION_RE = re.compile(r'(?:^|\n)\*{0,2}(Missing\s+[A-Za-z\s]+|Overall\s+[A-Za-z\s]+)\*{0,2}(?:\n|$)', re.MULTILINE)
+
+# Bullet point line (•, -, or *), capturing the item text
+_BULLET_RE = re.compile(r'^[•\-\*]\s+(.*)$')
+
+# Markdown bold (**text**)
+_BOLD_RE = re.compile(r'\*\*(.+?)\*\*')
+
+# Row statuses that count as a discrepancy worth analyzing
+_DISCREPANCY_STATUSES = frozenset({"higher", "lower", "missing"})
+
+# Per-request timeout (seconds) and transport-level retries (connection errors,
+# 408/409/429/5xx, with the client's own backoff) for every OpenAI client, so a
+# hung connection cannot block an analysis indefinitely
+OPENAI_TIMEOUT = 30.0
+OPENAI_MAX_RETRIES = 3
+
+# Further attempts after the client's own retries give up on a rate limit,
+# waiting 2 ** attempt seconds (capped) between them
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_MAX_BACKOFF = 60
+
+
+def _rate_limit_backoff(attempt: int) -> int:
+    """Seconds to wait before retrying a rate-limited request"""
+    return min(RATE_LIMIT_MAX_BACKOFF, 2 ** attempt)
+
+
+# Sync OpenAI clients by API key, shared by all analyzers so their HTTP
+# connection pools (and kept-alive TLS connections) are reused across calls
+_CLIENT_CACHE: Dict[str, OpenAI] = {}
+_client_cache_lock = threading.Lock()
+
+
+def _get_client(api_key: str) -> OpenAI:
+    """Return the shared OpenAI client for an API key, creating it on first use"""
+    with _client_cache_lock:
+        client = _CLIENT_CACHE.get(api_key)
+        if client is None:
+            client = _CLIENT_CACHE[api_key] = OpenAI(
+                api_key=api_key, timeout=OPENAI_TIMEOUT, max_retries=OPENAI_MAX_RETRIES
+            )
+        return client
+
+
+# Formatted analyses by request signature, so re-analyzing an unchanged report
+# (re-runs, retries, re-opened results) needs no OpenAI call; least recently
+# used entries are evicted past the limit
+ANALYSIS_CACHE_SIZE = 256
+_analysis_cache: "OrderedDict[str, str]" = OrderedDict()
+_analysis_cache_lock = threading.Lock()
+
+
+# Finish reason of a response the model completed; only these are cached, never
+# analyses cut off by the token budget, a content filter or an error
+_COMPLETE_FINISH_REASON = "stop"
+
+
+def _cached_analysis(key: str) -> Optional[str]:
+    """Return the cached analysis for a request signature, if any"""
+    with _analysis_cache_lock:
+        analysis = _analysis_cache.get(key)
+        if analysis is not None:
+            _analysis_cache.move_to_end(key)
+        return analysis
+
+
+def _cache_analysis(key: str, analysis: str):
+    """Remember a formatted analysis under its request signature"""
+    with _analysis_cache_lock:
+        _analysis_cache[key] = analysis
+        _analysis_cache.move_to_end(key)
+        while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+
+
+# System message sent with every analysis request
+_SYSTEM_PROMPT = (
+    "You are a financial reconciliation expert specializing in card payment transaction analysis "
+    "and fee reconciliation. Provide detailed, technical analysis of discrepancies."
+)
+
+# Introduces the JSON discrepancy list and its compact keys
+_DISCREPANCIES_HEADER = (
+    "IDENTIFIED DISCREPANCIES (JSON array; fee = fee type, calc = calculated value, "
+    "visa = VISA invoice value, diff = difference, status = discrepancy status, "
+    "method = calculation method):\n"
+)
+
+# Instructions appended to every analysis prompt after the discrepancy list
+_TASK_FOOTER = """
+TASK:
+Provide a detailed, fee-specific root cause analysis of why these discrepancies exist.
+
+FORMATTING REQUIREMENTS:
+- Use clear structure with numbered sections and subsections
+- Use bullet points (•) for listing causes
+- Keep each point concise and specific
+- Use proper paragraph breaks between sections
+- Reference exact fee names and percentages from the data
+
+ANALYSIS STRUCTURE:
+
+PART 1: FEE-BY-FEE ANALYSIS
+For EACH fee type listed above with a discrepancy, provide:
+- Fee name with variance percentage in parentheses (e.g., "Integrity Fee variance (+56.9%)")
+- Brief description of the discrepancy (calculated vs VISA)
+- "Possible causes:" followed by bullet points with specific root causes
+
+Example format for each fee:
+Fee Name variance (+X.X%)
+Brief description.
+Possible causes:
+• Specific cause related to this fee (e.g., tier application, rate mismatch)
+• Data quality issue specific to this fee
+• FX conversion or timing issue if applicable
+
+PART 2: MISSING FEES ANALYSIS
+If there are fees showing "Missing" status:
+- List which fees are missing
+- Explain what "Missing Calculations" means
+- Connect to reconciliation metrics (Item Reconciled, Match %)
+
+PART 3: OVERALL PATTERNS
+Identify cross-cutting issues:
+• Systematic problems affecting multiple fees
+• Common root causes across fee types
+• Data quality patterns
+
+IMPORTANT RULES:
+- Provide ONLY analysis, NO recommendations or action items
+- Be VERY specific - reference actual amounts, rates, and percentages
+- For each fee, identify the MOST PROBABLE specific root cause
+- Focus on technical/operational causes (formulas, data, rates, mapping)
+- Keep total length {min_words}-{max_words} words
+- Use technical terminology appropriately (FX conversion, tier application, fee mapping, etc.)
+
+ROOT CAUSE ANALYSIS:"""
+
+
+# Completion token budget: a base allowance plus a share per discrepancy, so
+# small reports don't leave room for the model to ramble
+ANALYSIS_MAX_TOKENS = 1000
+ANALYSIS_BASE_TOKENS = 200
+ANALYSIS_TOKENS_PER_DISCREPANCY = 150
+
+
+# Model routing: small discrepancy sets (few fees, modest variances) go to the
+# faster model, everything else to the more capable one
+SIMPLE_ANALYSIS_MODEL = "gpt-4o-mini"
+COMPLEX_ANALYSIS_MODEL = "gpt-4o"
+SIMPLE_MAX_DISCREPANCIES = 3
+SIMPLE_MAX_VARIANCE = 20.0
+
+
+def _variance_magnitude(discrepancy: Dict) -> float:
+    """Absolute percentage variance of a discrepancy (0 when unknown)"""
+    try:
+        return abs(float(discrepancy.get("percentage_diff") or 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _discrepancy_priority(discrepancy: Dict) -> float:
+    """Ranking weight of a discrepancy: its variance, or 100% for a missing fee line"""
+    if discrepancy.get("diff_status") == "missing":
+        return max(100.0, _variance_magnitude(discrepancy))
+    return _variance_magnitude(discrepancy)
+
+
+# Discrepancies listed individually in a prompt; the rest are summarized in one
+# entry so very large reports keep the prompt (and latency) bounded
+PROMPT_MAX_DISCREPANCIES = 25
 
 
 class RootCauseAnalyzer:
@@ -20,7 +214,10 @@ class RootCauseAnalyzer:
             api_key: OpenAI API key (defaults to OPENAI_API_KEY environment variable)
         """
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        self.client = _get_client(self.api_key) if self.api_key else None
+        # Async client, created on first async request (see _get_aclient) so
+        # analyzers used only synchronously never build one
+        self.aclient = None
         self.model = "gpt-3.5-turbo"
 
     def check_openai_availability(self) -> bool:
@@ -32,83 +229,455 @@ class RootCauseAnalyzer:
         """
         return self.client is not None and self.api_key is not None
 
-    def generate_analysis(self, prompt: str) -> Optional[str]:
+    def generate_analysis(self, prompt: str, model: Optional[str] = None,
+                          max_tokens: Optional[int] = None) -> Optional[str]:
         """
         Generate analysis using OpenAI GPT model
 
         Args:
             prompt: The prompt to send to OpenAI
+            model: Model to use (defaults to the analyzer's model)
+            max_tokens: Completion token budget (defaults to ANALYSIS_MAX_TOKENS)
+
+        Returns:
+            str: Generated analysis or None if failed
+        """
+        analysis, _ = self._request_analysis(prompt, model, max_tokens)
+        return analysis
+
+    def _request_analysis(self, prompt: str, model: Optional[str] = None,
+                          max_tokens: Optional[int] = None) -> Tuple[Optional[str], bool]:
+        """
+        Generate analysis and report whether the model finished it
+
+        Args:
+            prompt: The prompt to send to OpenAI
+            model: Model to use (defaults to the analyzer's model)
+            max_tokens: Completion token budget (defaults to ANALYSIS_MAX_TOKENS)
+
+        Returns:
+            tuple: (analysis, complete) - analysis is None if failed; complete
+                is True only for a finished response, which is safe to cache
+        """
+        if not self.check_openai_availability():
+            return None, False
+
+        try:
+            response = self._create_completion(**self._completion_params(prompt, model, max_tokens))
+            return self._response_text(response), self._response_complete(response)
+
+        except APIError as e:
+            print(f"Error generating analysis: {str(e)}")
+            return None, False
+
+    def stream_analysis(self, prompt: str, model: Optional[str] = None,
+                        max_tokens: Optional[int] = None) -> Iterator[str]:
+        """
+        Stream analysis text from OpenAI as it is generated
+
+        Args:
+            prompt: The prompt to send to OpenAI
+            model: Model to use (defaults to the analyzer's model)
+            max_tokens: Completion token budget (defaults to ANALYSIS_MAX_TOKENS)
+
+        Yields:
+            str: Text deltas in generation order (nothing if the request failed)
+
+        Raises:
+            APIError: If the stream fails after text was already yielded, so a
+                truncated analysis is never mistaken for a complete one
+        """
+        if not self.check_openai_availability():
+            return
+
+        streamed = False
+        try:
+            response = self._create_completion(**self._completion_params(prompt, model, max_tokens), stream=True)
+
+            for chunk in response:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        streamed = True
+                        yield delta
+
+        except APIError as e:
+            print(f"Error generating analysis: {str(e)}")
+            if streamed:
+                raise
+
+    async def agenerate_analysis(self, prompt: str, model: Optional[str] = None,
+                                 max_tokens: Optional[int] = None) -> Optional[str]:
+        """
+        Generate analysis using OpenAI GPT model without blocking the event loop
+
+        Args:
+            prompt: The prompt to send to OpenAI
+            model: Model to use (defaults to the analyzer's model)
+            max_tokens: Completion token budget (defaults to ANALYSIS_MAX_TOKENS)
 
         Returns:
             str: Generated analysis or None if failed
         """
+        analysis, _ = await self._arequest_analysis(prompt, model, max_tokens)
+        return analysis
+
+    async def _arequest_analysis(self, prompt: str, model: Optional[str] = None,
+                                 max_tokens: Optional[int] = None) -> Tuple[Optional[str], bool]:
+        """
+        Generate analysis without blocking the event loop and report whether
+        the model finished it
+
+        Args:
+            prompt: The prompt to send to OpenAI
+            model: Model to use (defaults to the analyzer's model)
+            max_tokens: Completion token budget (defaults to ANALYSIS_MAX_TOKENS)
+
+        Returns:
+            tuple: (analysis, complete) - analysis is None if failed; complete
+                is True only for a finished response, which is safe to cache
+        """
         try:
             if not self.check_openai_availability():
-                return None
-
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a financial reconciliation expert specializing in card payment transaction analysis and fee reconciliation. Provide detailed, technical analysis of discrepancies."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
+                return None, False
 
-            if response.choices and len(response.choices) > 0:
-                return response.choices[0].message.content.strip()
-            else:
-                print("OpenAI API returned no choices")
-                return None
+            response = await self._acreate_completion(**self._completion_params(prompt, model, max_tokens))
+            return self._response_text(response), self._response_complete(response)
 
-        except Exception as e:
+        except APIError as e:
             print(f"Error generating analysis: {str(e)}")
+            return None, False
+
+    def _create_completion(self, **params):
+        """
+        Create a chat completion, backing off and retrying while rate limited
+
+        Args:
+            **params: Keyword arguments for chat.completions.create
+
+        Returns:
+            The completion (or stream) returned by the OpenAI client
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                return self.client.chat.completions.create(**params)
+            except RateLimitError:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                time.sleep(_rate_limit_backoff(attempt))
+
+    async def _acreate_completion(self, **params):
+        """
+        Create a chat completion on the async client, backing off and retrying
+        while rate limited without blocking the event loop
+
+        Args:
+            **params: Keyword arguments for chat.completions.create
+
+        Returns:
+            The completion returned by the OpenAI client
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                return await self._get_aclient().chat.completions.create(**params)
+            except RateLimitError:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                await asyncio.sleep(_rate_limit_backoff(attempt))
+
+    def _completion_params(self, prompt: str, model: Optional[str] = None,
+                           max_tokens: Optional[int] = None) -> Dict:
+        """
+        Build the chat completion request parameters for a prompt
+
+        Args:
+            prompt: The prompt to send to OpenAI
+            model: Model to use (defaults to the analyzer's model)
+            max_tokens: Completion token budget (defaults to ANALYSIS_MAX_TOKENS)
+
+        Returns:
+            dict: Keyword arguments for chat.completions.create
+        """
+        return {
+            "model": model or self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": _SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.7,
+            "max_tokens": max_tokens or ANALYSIS_MAX_TOKENS
+        }
+
+    def _cache_key(self, prompt: str, model: Optional[str] = None,
+                   max_tokens: Optional[int] = None) -> str:
+        """
+        Compute the analysis cache key for a prompt
+
+        The key covers the full request (model, messages and sampling
+        settings), and the prompt already carries the discrepancies and
+        summary figures, so equal keys mean an identical OpenAI request.
+
+        Args:
+            prompt: The prompt to send to OpenAI
+            model: Model to use (defaults to the analyzer's model)
+            max_tokens: Completion token budget (defaults to ANALYSIS_MAX_TOKENS)
+
+        Returns:
+            str: SHA-256 hex digest of the request parameters
+        """
+        params = json.dumps(self._completion_params(prompt, model, max_tokens), sort_keys=True)
+        return hashlib.sha256(params.encode("utf-8")).hexdigest()
+
+    def _response_text(self, response) -> Optional[str]:
+        """
+        Extract the analysis text from a chat completion response
+
+        Args:
+            response: Chat completion response
+
+        Returns:
+            str: Analysis text or None if the response has no choices or no
+                content (e.g., a refusal or content-filtered response)
+        """
+        if response.choices and len(response.choices) > 0:
+            choice = response.choices[0]
+            if choice.message.content is not None:
+                return choice.message.content.strip()
+
+            print(f"OpenAI API returned no content (finish reason: {choice.finish_reason})")
             return None
 
-    def analyze_reconciliation_discrepancies(self, report: Dict) -> Optional[str]:
+        print("OpenAI API returned no choices")
+        return None
+
+    def _response_complete(self, response) -> bool:
+        """
+        Check whether the model finished a chat completion response
+
+        Args:
+            response: Chat completion response
+
+        Returns:
+            bool: True if generation stopped on its own rather than being cut
+                off (token budget, content filter)
+        """
+        return bool(response.choices) and response.choices[0].finish_reason == _COMPLETE_FINISH_REASON
+
+    def analyze_reconciliation_discrepancies(self, report: Dict, stream: bool = False):
         """
         Analyze reconciliation discrepancies and generate root cause analysis
 
         Args:
             report: Report context with reconciliation data
+            stream: Return an iterator of HTML fragments produced while the
+                analysis is being generated instead of the finished analysis
 
         Returns:
             str: Root cause analysis or None if not needed/failed
+                (an iterator of HTML fragments when stream is True)
+        """
+        result, request = self._prepare_analysis(report)
+        if request is None:
+            if stream:
+                return iter([result] if result else [])
+            return result
+
+        cache_key = self._cache_key(**request)
+        cached = _cached_analysis(cache_key)
+        if cached is not None:
+            return iter([cached]) if stream else cached
+
+        if stream:
+            return self._stream_formatted(self.stream_analysis(**request))
+
+        # Generate analysis
+        analysis, complete = self._request_analysis(**request)
+
+        if analysis:
+            # Format the analysis for better HTML rendering
+            analysis = self._format_analysis_html(analysis)
+            if complete:
+                _cache_analysis(cache_key, analysis)
+
+        return analysis
+
+    async def aanalyze_reconciliation_discrepancies(self, report: Dict) -> Optional[str]:
+        """
+        Analyze reconciliation discrepancies without blocking the event loop
+
+        Args:
+            report: Report context with reconciliation data
+
+        Returns:
+            str: Root cause analysis or None if not needed/failed
+        """
+        result, request = self._prepare_analysis(report)
+        if request is None:
+            return result
+
+        cache_key = self._cache_key(**request)
+        cached = _cached_analysis(cache_key)
+        if cached is not None:
+            return cached
+
+        analysis, complete = await self._arequest_analysis(**request)
+
+        if analysis:
+            # Format the analysis for better HTML rendering
+            analysis = self._format_analysis_html(analysis)
+            if complete:
+                _cache_analysis(cache_key, analysis)
+
+        return analysis
+
+    def _get_aclient(self) -> AsyncOpenAI:
+        """Return the analyzer's async OpenAI client, creating it on first use"""
+        if self.aclient is None:
+            self.aclient = AsyncOpenAI(
+                api_key=self.api_key, timeout=OPENAI_TIMEOUT, max_retries=OPENAI_MAX_RETRIES
+            )
+        return self.aclient
+
+    async def aclose(self):
+        """Close the async OpenAI client's connections, if one was created"""
+        if self.aclient is not None:
+            await self.aclient.close()
+            self.aclient = None
+
+    def _stream_formatted(self, deltas: Iterator[str]) -> Iterator[str]:
+        """
+        Format streamed analysis text as HTML one block at a time
+
+        Text is buffered until a blank line closes a block, so headers and
+        lists are never split across fragments.
+
+        Args:
+            deltas: Text deltas from stream_analysis
+
+        Yields:
+            str: HTML fragments in order
+        """
+        pending = ""
+
+        for delta in deltas:
+            pending += delta
+            complete, separator, pending_tail = pending.rpartition("\n\n")
+            if separator:
+                html = self._format_analysis_html(complete)
+                if html:
+                    yield html + "\n"
+                pending = pending_tail
+
+        if pending.strip():
+            yield self._format_analysis_html(pending)
+
+    def _prepare_analysis(self, report: Dict) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        Decide whether a report needs an OpenAI call and build its request
+
+        Args:
+            report: Report context with reconciliation data
+
+        Returns:
+            tuple: (result, request) - request holds the prompt, model and
+                max_tokens keyword arguments for generate_analysis; it is None
+                when no API call is needed, in which case result is the final
+                answer
         """
         # Check if analysis is needed (Amount Reconciled < 95%)
         amount_reconciled = report.get("summary", {}).get("amount_reconciled_percentage", 100)
 
         if amount_reconciled >= 95:
-            return None  # No analysis needed
+            return None, None  # No analysis needed
 
         # Check if OpenAI is available
         if not self.check_openai_availability():
-            return "❌ Root Cause Analysis unavailable: OpenAI API key is not configured. Please set the OPENAI_API_KEY environment variable."
+            return "❌ Root Cause Analysis unavailable: OpenAI API key is not configured. Please set the OPENAI_API_KEY environment variable.", None
 
         # Gather discrepancy data
         discrepancies = self._extract_discrepancies(report)
 
         if not discrepancies:
-            return "No significant discrepancies found to analyze."
+            return "No significant discrepancies found to analyze.", None
 
-        # Build analysis prompt
-        prompt = self._build_analysis_prompt(report, discrepancies)
+        # Build analysis prompt, sizing the model and token budget to the problem
+        prompt_discrepancies = self._prioritize_discrepancies(discrepancies)
+        max_tokens = min(ANALYSIS_MAX_TOKENS,
+                         ANALYSIS_BASE_TOKENS + ANALYSIS_TOKENS_PER_DISCREPANCY * len(prompt_discrepancies))
 
-        # Generate analysis
-        analysis = self.generate_analysis(prompt)
+        return None, {
+            "prompt": self._build_analysis_prompt(report, prompt_discrepancies, max_tokens),
+            "model": self._select_model(discrepancies),
+            "max_tokens": max_tokens
+        }
 
-        if analysis:
-            # Format the analysis for better HTML rendering
-            analysis = self._format_analysis_html(analysis)
+    def _prioritize_discrepancies(self, discrepancies: List[Dict],
+                                  top_k: int = PROMPT_MAX_DISCREPANCIES) -> List[Dict]:
+        """
+        Bound the discrepancy list sent to OpenAI
 
-        return analysis
+        Keeps the top_k discrepancies with the largest variance (missing fee
+        lines count as a full variance) in their original order and folds the
+        rest into one summary entry, so very large reports don't produce
+        oversized prompts.
+
+        Args:
+            discrepancies: List of discrepancy details
+            top_k: Maximum number of discrepancies listed individually
+
+        Returns:
+            list: Discrepancies for the prompt
+        """
+        if len(discrepancies) <= top_k:
+            return discrepancies
+
+        ranked = sorted(range(len(discrepancies)),
+                        key=lambda index: _discrepancy_priority(discrepancies[index]), reverse=True)
+        kept = set(ranked[:top_k])
+        rest = [discrepancies[index] for index in ranked[top_k:]]
+
+        status_counts = {}
+        for disc in rest:
+            status_counts[disc["diff_status"]] = status_counts.get(disc["diff_status"], 0) + 1
+        largest_variance = max(_variance_magnitude(disc) for disc in rest)
+
+        summary_entry = {
+            "fee_type": f"{len(rest)} other fees with smaller discrepancies",
+            "percentage_diff": None,
+            "diff_status": ", ".join(f"{count} {status}" for status, count in status_counts.items()),
+            "calculated_value": "N/A",
+            "visa_value": "N/A",
+            "calculation_method": "N/A",
+            "percentage_diff_display": f"up to {largest_variance:.1f}%"
+        }
+        summary_entry["prompt_record"] = self._prompt_record(summary_entry)
+
+        return [disc for index, disc in enumerate(discrepancies) if index in kept] + [summary_entry]
+
+    def _select_model(self, discrepancies: List[Dict]) -> str:
+        """
+        Pick the model for a discrepancy set based on its complexity
+
+        A few small variances are handled by the faster, cheaper model; larger
+        or more widespread discrepancies go to the more capable one.
+
+        Args:
+            discrepancies: List of discrepancy details
+
+        Returns:
+            str: Model name
+        """
+        max_variance = max((_variance_magnitude(disc) for disc in discrepancies), default=0.0)
+
+        if len(discrepancies) <= SIMPLE_MAX_DISCREPANCIES and max_variance < SIMPLE_MAX_VARIANCE:
+            return SIMPLE_ANALYSIS_MODEL
+        return COMPLEX_ANALYSIS_MODEL
 
     def _format_analysis_html(self, analysis: str) -> str:
         """
@@ -120,45 +689,18 @@ class RootCauseAnalyzer:
         Returns:
             str: HTML-formatted analysis
         """
-        import re
-
         # First, detect and format PART headers (e.g., "**PART 1: FEE-BY-FEE ANALYSIS**")
-        # Match with optional ** around the text
-        analysis = re.sub(
-            r'(?:^|\n)\*{0,2}(PART\s+\d+:?\s*[A-Z\s\-]+?)\*{0,2}(?:\n|$)',
-            r'\n<h3>\1</h3>\n',
-            analysis,
-            flags=re.MULTILINE
-        )
-
-        # Format numbered fee sections (e.g., "**1. Integrity Fee variance (+56.9%)**")
-        # Match: "**Number. Fee Name variance (±X.X%)**"
-        analysis = re.sub(
-            r'(?:^|\n)\*{0,2}(\d+\.\s+[A-Za-z\s\-]+?(?:Fee|Fees))\s+(?:variance\s+)?\(([\+\-][\d\.]+%)\)\*{0,2}',
-            r'\n<h4>\1 (\2)</h4>\n',
-            analysis,
-            flags=re.MULTILINE
-        )
-
-        # Format fee-specific subsections without numbers (e.g., "Integrity Fee variance (+56.9%)")
-        analysis = re.sub(
-            r'(?:^|\n)\*{0,2}([A-Za-z\s\-]+?(?:Fee|Fees))\s+(?:variance\s+)?\(([\+\-][\d\.]+%)\)\*{0,2}',
-            r'\n<h4>\1 (\2)</h4>\n',
-            analysis,
-            flags=re.MULTILINE
-        )
+        analysis = _PART_HEADER_RE.sub(r'\n<h3>\1</h3>\n', analysis)
+
+        # Format fee sections, numbered or not (e.g., "**1. Integrity Fee variance (+56.9%)**")
+        analysis = _FEE_VARIANCE_RE.sub(r'\n<h4>\1 (\2)</h4>\n', analysis)
 
         # Format "Missing Fee Lines" or similar section headers
-        analysis = re.sub(
-            r'(?:^|\n)\*{0,2}(Missing\s+[A-Za-z\s]+|Overall\s+[A-Za-z\s]+)\*{0,2}(?:\n|$)',
-            r'\n<h4>\1</h4>\n',
-            analysis,
-            flags=re.MULTILINE
-        )
+        analysis = _MISSING_SECTION_RE.sub(r'\n<h4>\1</h4>\n', analysis)
 
         # Split into lines for processing
         lines = analysis.split('\n')
-        formatted_lines = []
+        buffer = io.StringIO()
         in_list = False
         in_causes_section = False
 
@@ -168,7 +710,7 @@ class RootCauseAnalyzer:
             # Skip empty lines when not in a list
             if not stripped:
                 if in_list:
-                    formatted_lines.append('</ul>')
+                    buffer.write('</ul>\n')
                     in_list = False
                     in_causes_section = False
                 continue
@@ -176,51 +718,51 @@ class RootCauseAnalyzer:
             # Check for "Possible causes:" text
             if stripped.lower().startswith('possible cause'):
                 if in_list:
-                    formatted_lines.append('</ul>')
+                    buffer.write('</ul>\n')
                     in_list = False
-                formatted_lines.append(f'<p><strong>{stripped}</strong></p>')
+                buffer.write(f'<p><strong>{stripped}</strong></p>\n')
                 in_causes_section = True
                 continue
 
             # Check if line starts with bullet point (•, -, or *)
-            if re.match(r'^[•\-\*]\s+', stripped):
+            bullet = _BULLET_RE.match(stripped)
+            if bullet:
                 if not in_list:
-                    formatted_lines.append('<ul class="analysis-list">')
+                    buffer.write('<ul class="analysis-list">\n')
                     in_list = True
-                # Remove bullet and wrap in list item
-                content = re.sub(r'^[•\-\*]\s+', '', stripped)
-                formatted_lines.append(f'<li>{content}</li>')
+                # Wrap the text after the bullet in a list item
+                buffer.write(f'<li>{bullet.group(1)}</li>\n')
 
             # Check if it's an already formatted header (h3 or h4)
-            elif '<h3>' in stripped or '<h4>' in stripped:
+            elif stripped.startswith(('<h3>', '<h4>')):
                 if in_list:
-                    formatted_lines.append('</ul>')
+                    buffer.write('</ul>\n')
                     in_list = False
                     in_causes_section = False
-                formatted_lines.append(stripped)
+                buffer.write(stripped + '\n')
 
             # Regular text lines
             else:
                 if in_list and not in_causes_section:
-                    formatted_lines.append('</ul>')
+                    buffer.write('</ul>\n')
                     in_list = False
                     in_causes_section = False
 
                 # Don't wrap very short lines (likely incomplete)
                 if len(stripped) > 5:
-                    formatted_lines.append(f'<p>{stripped}</p>')
+                    buffer.write(f'<p>{stripped}</p>\n')
 
         # Close list if still open at the end
         if in_list:
-            formatted_lines.append('</ul>')
+            buffer.write('</ul>\n')
 
-        # Join and clean up multiple consecutive paragraph tags
-        result = '\n'.join(formatted_lines)
-        result = re.sub(r'</p>\s*<p>', '</p>\n<p>', result)
+        # Every block is written on its own line, so consecutive paragraphs are
+        # already separated by a single newline
+        result = buffer.getvalue().rstrip('\n')
 
         # Convert any remaining Markdown bold syntax (**text**) to HTML bold
         # This handles bold text that wasn't part of headers or section titles
-        result = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', result)
+        result = _BOLD_RE.sub(r'<strong>\1</strong>', result)
 
         return result
 
@@ -236,48 +778,66 @@ class RootCauseAnalyzer:
         """
         discrepancies = []
 
-        sheets = report.get("sheets", [])
-
-        for sheet in sheets:
-            rows = sheet.get("rows", [])
-
-            for row in rows:
-                fee_type = row.get("fee_type", "Unknown")
-                percentage_diff = row.get("percentage_diff")
-                diff_status = row.get("diff_status", "")
-                calculated_amount_display = row.get("calculated_amount_display", "N/A")
-                visa_amount_display = row.get("visa_amount_display", "N/A")
-                final_amount_display = row.get("final_amount_display", "N/A")
-                calculation_method = row.get("calculation_method", "N/A")
-
+        for sheet in report.get("sheets", ()):
+            for row in sheet.get("rows", ()):
                 # Only include items with actual discrepancies
-                if diff_status in ["higher", "lower", "missing"]:
-                    discrepancies.append({
-                        "fee_type": fee_type,
-                        "percentage_diff": percentage_diff,
-                        "diff_status": diff_status,
-                        "calculated_value": final_amount_display,
-                        "visa_value": visa_amount_display,
-                        "calculation_method": calculation_method,
-                        "percentage_diff_display": row.get("percentage_diff_display", "N/A")
-                    })
+                diff_status = row.get("diff_status", "")
+                if diff_status not in _DISCREPANCY_STATUSES:
+                    continue
+
+                discrepancy = {
+                    "fee_type": row.get("fee_type", "Unknown"),
+                    "percentage_diff": row.get("percentage_diff"),
+                    "diff_status": diff_status,
+                    "calculated_value": row.get("final_amount_display", "N/A"),
+                    "visa_value": row.get("visa_amount_display", "N/A"),
+                    "calculation_method": row.get("calculation_method", "N/A"),
+                    "percentage_diff_display": row.get("percentage_diff_display", "N/A")
+                }
+                discrepancy["prompt_record"] = self._prompt_record(discrepancy)
+                discrepancies.append(discrepancy)
 
         return discrepancies
 
-    def _build_analysis_prompt(self, report: Dict, discrepancies: List[Dict]) -> str:
+    def _prompt_record(self, discrepancy: Dict) -> str:
+        """
+        Serialize a discrepancy as the compact JSON record used in the prompt
+
+        Args:
+            discrepancy: Discrepancy details
+
+        Returns:
+            str: JSON object with the short prompt keys
+        """
+        return json.dumps({
+            "fee": discrepancy["fee_type"],
+            "calc": discrepancy["calculated_value"],
+            "visa": discrepancy["visa_value"],
+            "diff": discrepancy["percentage_diff_display"],
+            "status": discrepancy["diff_status"],
+            "method": discrepancy["calculation_method"]
+        }, separators=(',', ':'), ensure_ascii=False, default=str)
+
+    def _build_analysis_prompt(self, report: Dict, discrepancies: List[Dict],
+                               max_tokens: Optional[int] = None) -> str:
         """
         Build the prompt for OpenAI to analyze discrepancies
 
         Args:
             report: Report context
             discrepancies: List of discrepancy details
+            max_tokens: Completion token budget the requested length must fit in
 
         Returns:
             str: Formatted prompt
         """
         summary = report.get("summary", {})
 
-        prompt = f"""You are a financial reconciliation expert. Analyze the following reconciliation discrepancies and provide a root cause analysis.
+        # Ask for a length that fits the budget (~0.6 words per token)
+        max_words = max(100, round((max_tokens or ANALYSIS_MAX_TOKENS) * 0.6 / 50) * 50)
+        min_words = round(max_words * 2 / 3 / 50) * 50
+
+        parts = [f"""You are a financial reconciliation expert. Analyze the following reconciliation discrepancies and provide a root cause analysis.
 
 RECONCILIATION SUMMARY:
 - Amount Reconciled: {summary.get('amount_reconciled_display', 'N/A')}
@@ -286,69 +846,17 @@ RECONCILIATION SUMMARY:
 - Calculated Total: {summary.get('total_final_amount_display', 'N/A')}
 - VISA Invoice Total: {summary.get('total_visa_amount_display', 'N/A')}
 
-IDENTIFIED DISCREPANCIES:
-"""
-
-        for i, disc in enumerate(discrepancies, 1):
-            prompt += f"""
-{i}. {disc['fee_type']}
-   - Calculated Value: {disc['calculated_value']}
-   - VISA Invoice Value: {disc['visa_value']}
-   - Difference: {disc['percentage_diff_display']}
-   - Status: {disc['diff_status']}
-   - Calculation Method: {disc['calculation_method']}
-"""
-
-        prompt += """
-TASK:
-Provide a detailed, fee-specific root cause analysis of why these discrepancies exist.
-
-FORMATTING REQUIREMENTS:
-- Use clear structure with numbered sections and subsections
-- Use bullet points (•) for listing causes
-- Keep each point concise and specific
-- Use proper paragraph breaks between sections
-- Reference exact fee names and percentages from the data
-
-ANALYSIS STRUCTURE:
-
-PART 1: FEE-BY-FEE ANALYSIS
-For EACH fee type listed above with a discrepancy, provide:
-- Fee name with variance percentage in parentheses (e.g., "Integrity Fee variance (+56.9%)")
-- Brief description of the discrepancy (calculated vs VISA)
-- "Possible causes:" followed by bullet points with specific root causes
-
-Example format for each fee:
-Fee Name variance (+X.X%)
-Brief description.
-Possible causes:
-• Specific cause related to this fee (e.g., tier application, rate mismatch)
-• Data quality issue specific to this fee
-• FX conversion or timing issue if applicable
-
-PART 2: MISSING FEES ANALYSIS
-If there are fees showing "Missing" status:
-- List which fees are missing
-- Explain what "Missing Calculations" means
-- Connect to reconciliation metrics (Item Reconciled, Match %)
-
-PART 3: OVERALL PATTERNS
-Identify cross-cutting issues:
-• Systematic problems affecting multiple fees
-• Common root causes across fee types
-• Data quality patterns
+""", _DISCREPANCIES_HEADER]
 
-IMPORTANT RULES:
-- Provide ONLY analysis, NO recommendations or action items
-- Be VERY specific - reference actual amounts, rates, and percentages
-- For each fee, identify the MOST PROBABLE specific root cause
-- Focus on technical/operational causes (formulas, data, rates, mapping)
-- Keep total length 400-600 words
-- Use technical terminology appropriately (FX conversion, tier application, fee mapping, etc.)
+        # One compact JSON record per discrepancy (serialized at extraction);
+        # the header above explains the keys
+        parts.append("[")
+        parts.append(",".join(disc["prompt_record"] for disc in discrepancies))
+        parts.append("]\n")
 
-ROOT CAUSE ANALYSIS:"""
+        parts.append(_TASK_FOOTER.format(min_words=min_words, max_words=max_words))
 
-        return prompt
+        return "".join(parts)
 
 
 def generate_root_cause_analysis(report: Dict, api_key: Optional[str] = None) -> Optional[str]:
@@ -364,3 +872,42 @@ def generate_root_cause_analysis(report: Dict, api_key: Optional[str] = None) ->
     """
     analyzer = RootCauseAnalyzer(api_key=api_key)
     return analyzer.analyze_reconciliation_discrepancies(report)
+
+
+async def generate_root_cause_analyses(reports: List[Dict], api_key: Optional[str] = None,
+                                       concurrency: int = 5) -> List[Optional[str]]:
+    """
+    Generate root cause analyses for several reports concurrently
+
+    Reports that need an OpenAI call are sent in parallel (at most
+    `concurrency` requests in flight) over one analyzer's async client.
+
+    Args:
+        reports: Report contexts with reconciliation data
+        api_key: Optional OpenAI API key (defaults to OPENAI_API_KEY environment variable)
+        concurrency: Maximum number of concurrent OpenAI requests
+
+    Returns:
+        list: Root cause analysis (or None) for each report, in input order;
+            a report whose analysis raised gets None without affecting the rest
+    """
+    analyzer = RootCauseAnalyzer(api_key=api_key)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def analyze(report: Dict) -> Optional[str]:
+        async with semaphore:
+            return await analyzer.aanalyze_reconciliation_discrepancies(report)
+
+    try:
+        results = await asyncio.gather(*(analyze(report) for report in reports), return_exceptions=True)
+    finally:
+        await analyzer.aclose()
+
+    analyses = []
+    for result in results:
+        if isinstance(result, BaseException):
+            print(f"Error generating root cause analysis: {str(result)}")
+            result = None
+        analyses.append(result)
+
+    return analyses